@@ -0,0 +1,121 @@
+"""Cubo de agregados por (ano, mês, fabricante, produto), montado uma vez a cada carga dos dados.
+
+Os indicadores gerais, o top de fabricantes e o desempenho por fabricante são
+respondidos fatiando o cubo, em vez de reagrupar as linhas originais a cada filtro.
+"""
+import numpy as np
+import pandas as pd
+
+from dados import alinhar_categorias, custo_arredondado
+
+CHAVES_CUBO = ['ano_compra', 'mes_compra', 'fabricante', 'produto']
+
+COLUNAS_QUANTIDADE = [
+    'quantidade fisica',
+    'quantidade solicitada',
+    'quantidade reservada',
+    'quantidade disponivel',
+    'quantidade avariada',
+]
+
+
+def construir_cubo(df):
+    """Soma as quantidades e o valor em estoque por (ano_compra, mes_compra, fabricante, produto).
+
+    O resultado é indexado e ordenado por (ano_compra, mes_compra), para que os filtros
+    globais sejam uma seleção direta no índice.
+    """
+    valores = df[CHAVES_CUBO + COLUNAS_QUANTIDADE].astype({coluna: 'int64' for coluna in COLUNAS_QUANTIDADE})
+    valores['valor_estoque'] = df['quantidade fisica'] * custo_arredondado(df['custo liquido entrada'])
+
+    cubo = valores.groupby(CHAVES_CUBO, observed=True, sort=True).sum().reset_index()
+    return cubo.set_index(['ano_compra', 'mes_compra'])
+
+
+def acrescentar_ao_cubo(cubo, df_novas):
+    """Soma ao cubo as linhas novas de uma exportação que cresceu, sem voltar às linhas antigas.
+
+    df_novas já deve estar preparada (ver dados.preparar_estoque). O cubo original não é alterado.
+    """
+    if df_novas.empty:
+        return cubo
+    cubo_novas = construir_cubo(df_novas)
+    combinado = pd.concat(alinhar_categorias(cubo.reset_index(), cubo_novas.reset_index()), ignore_index=True)
+    soma = combinado.groupby(CHAVES_CUBO, observed=True, sort=True).sum().reset_index()
+    return soma.set_index(['ano_compra', 'mes_compra'])
+
+
+def fatiar_cubo(cubo, ano=None, mes=None):
+    """Linhas do cubo para o ano/mês escolhidos (None significa 'Todos')."""
+    if ano is None:
+        return cubo
+    if ano not in cubo.index.get_level_values('ano_compra'):
+        return cubo.iloc[0:0]
+    fatia = cubo.xs(ano, level='ano_compra', drop_level=False)
+    if mes is None:
+        return fatia
+    return fatia[fatia.index.get_level_values('mes_compra') == mes]
+
+
+# Somas por fabricante: coluna do cubo -> coluna do resultado
+SOMAS_POR_FABRICANTE = {
+    'quantidade fisica': 'total_quantidade_fisica',
+    'quantidade avariada': 'total_quantidade_avariada',
+    'quantidade disponivel': 'total_quantidade_disponivel',
+    'quantidade solicitada': 'total_quantidade_solicitada',
+}
+
+
+def metricas_da_fatia(fatia):
+    """Totais por fabricante e indicadores gerais de uma fatia do cubo, numa única agregação.
+
+    Devolve (indicadores, df_totais_fabricante):
+    - indicadores: total de produtos únicos, total de itens físicos e valor total do estoque;
+    - df_totais_fabricante: somas das quantidades, número de produtos distintos e valor em
+      estoque por fabricante (na ordem das categorias de 'fabricante').
+
+    Tudo é feito sobre os códigos das categorias de 'fabricante' e 'produto', sem tocar nos
+    nomes; os indicadores gerais saem dos totais por fabricante.
+    """
+    fabricantes = fatia['fabricante'].cat.categories
+    codigos_fabricante = fatia['fabricante'].cat.codes.to_numpy().astype('int64')
+    codigos_produto = fatia['produto'].cat.codes.to_numpy().astype('int64')
+    total_produtos = len(fatia['produto'].cat.categories)
+
+    linhas_por_fabricante = np.bincount(codigos_fabricante, minlength=len(fabricantes))
+    presentes = linhas_por_fabricante > 0
+
+    totais = {'fabricante': pd.Categorical(fabricantes[presentes], categories=fabricantes)}
+    for coluna, nome in SOMAS_POR_FABRICANTE.items():
+        somas = np.bincount(codigos_fabricante, weights=fatia[coluna].to_numpy(), minlength=len(fabricantes))
+        totais[nome] = np.rint(somas[presentes]).astype('int64')
+    # Produtos distintos por fabricante: pares (fabricante, produto) distintos contados por fabricante
+    pares = pd.unique(codigos_fabricante * total_produtos + codigos_produto)
+    totais['contagem_produtos'] = np.bincount(pares // max(total_produtos, 1),
+                                              minlength=len(fabricantes))[presentes].astype('int64')
+    totais['valor_estoque'] = np.bincount(codigos_fabricante, weights=fatia['valor_estoque'].to_numpy(),
+                                          minlength=len(fabricantes))[presentes].astype('float64')
+    df_totais_fabricante = pd.DataFrame(totais)
+
+    indicadores = {
+        'total_produtos': int(np.count_nonzero(np.bincount(codigos_produto, minlength=total_produtos))),
+        'total_itens_fisicos': df_totais_fabricante['total_quantidade_fisica'].sum(),
+        'valor_total_estoque': df_totais_fabricante['valor_estoque'].sum(),
+    }
+    return indicadores, df_totais_fabricante
+
+
+def top_n_com_outros(df, coluna_rotulo, colunas_valor, coluna_ordem, n, rotulo_outros='Outros'):
+    """Soma colunas_valor por coluna_rotulo e mantém só os n maiores por coluna_ordem.
+
+    Os demais são somados numa última linha "Outros (k)", de modo que o resultado tem no
+    máximo n + 1 linhas, qualquer que seja o tamanho de df.
+    """
+    por_rotulo = df.groupby(coluna_rotulo, observed=True, sort=False)[colunas_valor].sum()
+    maiores = por_rotulo.nlargest(n, coluna_ordem)
+    if len(maiores) == len(por_rotulo):
+        return maiores.rename_axis(coluna_rotulo).reset_index()
+
+    restantes = por_rotulo.drop(maiores.index)
+    outros = restantes.sum().to_frame(f'{rotulo_outros} ({len(restantes)})').T
+    return pd.concat([maiores, outros]).rename_axis(coluna_rotulo).reset_index()
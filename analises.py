@@ -0,0 +1,358 @@
+"""Núcleo de cálculo do painel, sem dependência do Streamlit.
+
+Cada análise é uma função pura: recebe os dados (somente leitura) e os parâmetros e devolve
+um resultado novo, pronto para exibir. estoq.py só escolhe os parâmetros e desenha; o mesmo
+cálculo pode ser usado pelo benchmark ou por uma rotina em lote:
+
+    python analises.py df_estoque.csv --ano 2024 -o resultados/
+"""
+import argparse
+import concurrent.futures
+import contextlib
+import datetime
+import os
+
+import numpy as np
+import pandas as pd
+
+from agregados import construir_cubo, fatiar_cubo, metricas_da_fatia, top_n_com_outros
+from dados import COLUNA_DATA, carregar_estoque, custo_arredondado, indexar_periodos, faixa_do_periodo, faixa_das_datas
+
+COLUNAS_BAIXA_DISPONIBILIDADE = ['produto', 'fabricante', 'quantidade fisica', 'quantidade solicitada',
+                                 'quantidade reservada', 'quantidade disponivel']
+COLUNAS_AVARIAS = ['produto', 'fabricante', 'quantidade fisica', 'quantidade avariada', 'porcentagem_avaria']
+COLUNAS_ESTOQUE_PARADO = ['produto', 'fabricante', 'quantidade fisica', 'data ultima compra']
+COLUNAS_CRITICOS = ['produto', 'fabricante', 'quantidade fisica', 'quantidade solicitada', 'quantidade disponivel']
+
+# Limites (em dias desde a última compra) das faixas de idade do resumo do estoque parado
+FAIXAS_IDADE_DIAS = [30, 60, 90, 180, 365, 730]
+
+# Parâmetros das seções quando o usuário não escolhe outros (valores iniciais dos controles do painel)
+PARAMETROS_PADRAO = {
+    'limite_disponibilidade': 10,
+    'limite_dias_compra': 180,
+    'limite_critico': 5,
+    'top_n_criticos': 20,
+}
+
+
+def montar_dados(caminho_arquivo, ingestao=None):
+    """Lê o arquivo e monta tudo o que o painel usa de uma versão dos dados.
+
+    Devolve {'df', 'rejeitadas', 'cubo', 'indice_periodos'}, com df ordenado pela data.
+    Com 'ingestao' (dados.IngestaoIncremental), só as linhas novas do arquivo são lidas.
+    """
+    if ingestao is not None:
+        df, df_rejeitadas, cubo = ingestao.atualizar()
+    else:
+        # Usa o snapshot colunar gerado por 'python dados.py' quando ele foi gerado da versão atual do CSV
+        df, df_rejeitadas = carregar_estoque(caminho_arquivo)
+        cubo = construir_cubo(df)
+    return {
+        'df': df,
+        'rejeitadas': df_rejeitadas,
+        # Agregados por (ano, mês, fabricante, produto) e faixas de linhas de cada (ano, mês)
+        'cubo': cubo,
+        'indice_periodos': indexar_periodos(df),
+    }
+
+
+def aplicar_filtros(dados, ano=None, mes=None, data_inicial=None, data_final=None, memorizar=None):
+    """Linhas e agregados dos filtros globais (None significa 'Todos' / intervalo aberto).
+
+    Devolve {'df', 'cubo', 'indicadores', 'totais_fabricante', 'inicio', 'fim'}. Como df está ordenado pela
+    data, ano/mês e intervalo de datas são faixas contíguas de linhas: df é um fatiamento
+    posicional [inicio:fim] (sem máscara e sem cópia), ou o próprio dados['df'] sem filtro.
+
+    memorizar(chave, calcular), se informado, guarda os indicadores e totais por fabricante sob
+    a chave ('metricas_da_fatia', ano, mes, inicio, fim) (ver cache_disco.CacheEmDisco.obter).
+    """
+    df_estoque = dados['df']
+    inicio_periodo, fim_periodo = faixa_do_periodo(dados['indice_periodos'], ano=ano, mes=mes,
+                                                   total_linhas=len(df_estoque))
+    inicio_datas, fim_datas = faixa_das_datas(df_estoque, data_inicial, data_final)
+    inicio = max(inicio_periodo, inicio_datas)
+    fim = max(inicio, min(fim_periodo, fim_datas))
+
+    if inicio == 0 and fim == len(df_estoque):
+        df_filtrado = df_estoque
+    else:
+        df_filtrado = df_estoque.iloc[inicio:fim]
+
+    # O cubo só tem granularidade mensal: com um intervalo de datas parcial, os agregados
+    # são montados a partir das linhas filtradas.
+    datas = df_estoque[COLUNA_DATA]
+    intervalo_completo = df_estoque.empty or (
+        (data_inicial is None or pd.Timestamp(data_inicial) <= datas.iloc[0].normalize())
+        and (data_final is None or pd.Timestamp(data_final) >= datas.iloc[-1].normalize()))
+    if intervalo_completo:
+        cubo_filtrado = fatiar_cubo(dados['cubo'], ano=ano, mes=mes)
+    else:
+        cubo_filtrado = construir_cubo(df_filtrado)
+
+    # Indicadores da visão geral, top de fabricantes e seção 5 saem da mesma agregação
+    if memorizar is None:
+        indicadores, df_totais_fabricante = metricas_da_fatia(cubo_filtrado)
+    else:
+        indicadores, df_totais_fabricante = memorizar(('metricas_da_fatia', ano, mes, inicio, fim),
+                                                      lambda: metricas_da_fatia(cubo_filtrado))
+    return {
+        'df': df_filtrado,
+        'cubo': cubo_filtrado,
+        'indicadores': indicadores,
+        'totais_fabricante': df_totais_fabricante,
+        'inicio': inicio,
+        'fim': fim,
+    }
+
+
+def top_fabricantes(df_totais_fabricante, n=10):
+    """Os n fabricantes com maior quantidade física."""
+    return df_totais_fabricante.nlargest(n, 'total_quantidade_fisica')
+
+
+def resumo_quantidades(df):
+    """Quantidades física, solicitada, reservada e disponível somadas por produto.
+
+    df pode ser as linhas filtradas ou a fatia correspondente do cubo (mesmo resultado, menos linhas).
+    """
+    return df.groupby('produto', observed=True).agg(
+        quantidade_fisica=('quantidade fisica', 'sum'),
+        quantidade_solicitada=('quantidade solicitada', 'sum'),
+        quantidade_reservada=('quantidade reservada', 'sum'),
+        quantidade_disponivel=('quantidade disponivel', 'sum')
+    ).reset_index()
+
+
+def indexar_disponibilidade(df):
+    """Índice de df para baixa_disponibilidade e produtos_criticos com qualquer limite.
+
+    As linhas ficam ordenadas por 'quantidade disponivel' (um limite vira uma busca binária e
+    uma fatia contígua) e cada linha guarda sua posição na ordem das mais solicitadas às menos
+    (a fatia volta a essa ordem com uma ordenação de inteiros só das linhas selecionadas).
+    É montado uma vez por df filtrado; devolve {'ordem_disponivel', 'disponivel_ordenada',
+    'ordem_solicitada', 'posicao_solicitada', 'com_solicitacao'}.
+    """
+    disponivel = df['quantidade disponivel'].to_numpy()
+    solicitada = df['quantidade solicitada'].to_numpy()
+    ordem_disponivel = np.argsort(disponivel, kind='stable')
+    # Das mais solicitadas às menos; empates na ordem original das linhas
+    ordem_solicitada = np.argsort(-solicitada.astype('int64'), kind='stable')
+    posicao_solicitada = np.empty(len(df), dtype='int64')
+    posicao_solicitada[ordem_solicitada] = np.arange(len(df))
+    return {
+        'ordem_disponivel': ordem_disponivel,
+        'disponivel_ordenada': disponivel[ordem_disponivel],
+        'ordem_solicitada': ordem_solicitada,
+        'posicao_solicitada': posicao_solicitada,
+        # As linhas com solicitação são as primeiras da ordem por 'quantidade solicitada'
+        'com_solicitacao': int(np.count_nonzero(solicitada > 0)),
+    }
+
+
+def _linhas_por_solicitada(indice, disponivel_minima, limite_disponivel):
+    # Posições das linhas com disponivel_minima <= disponível < limite, das mais solicitadas às menos
+    disponivel_ordenada = indice['disponivel_ordenada']
+    inicio = 0 if disponivel_minima is None else np.searchsorted(disponivel_ordenada, disponivel_minima, side='left')
+    fim = np.searchsorted(disponivel_ordenada, limite_disponivel, side='left')
+    return np.sort(indice['posicao_solicitada'][indice['ordem_disponivel'][inicio:fim]])
+
+
+def _selecionar_linhas(df, linhas, colunas):
+    return df.iloc[linhas, df.columns.get_indexer(colunas)]
+
+
+def baixa_disponibilidade(df, limite_disponibilidade, indice=None):
+    """Linhas com 'quantidade disponivel' entre 0 e o limite (exclusive), das mais solicitadas às menos.
+
+    Com 'indice' (indexar_disponibilidade(df)), não percorre nem ordena df inteiro.
+    """
+    if indice is not None:
+        posicoes = _linhas_por_solicitada(indice, 0, limite_disponibilidade)
+        return _selecionar_linhas(df, indice['ordem_solicitada'][posicoes], COLUNAS_BAIXA_DISPONIBILIDADE)
+    disponivel = df['quantidade disponivel']
+    mascara = (disponivel < limite_disponibilidade) & (disponivel >= 0)
+    return df.loc[mascara, COLUNAS_BAIXA_DISPONIBILIDADE].sort_values(by='quantidade solicitada', ascending=False,
+                                                                      kind='stable')
+
+
+def avarias(df):
+    """Linhas com avaria e o percentual avariado da quantidade física, das mais avariadas às menos."""
+    df_avariado = df[df['quantidade avariada'] > 0]
+    df_avariado = df_avariado.assign(
+        porcentagem_avaria=((df_avariado['quantidade avariada'] / df_avariado['quantidade fisica']) * 100).fillna(0)
+    )
+    return df_avariado[COLUNAS_AVARIAS].sort_values(by='quantidade avariada', ascending=False)
+
+
+def indexar_idade(df):
+    """Índice de df para estoque_parado e valor_por_faixa_de_idade com qualquer data de referência e limite.
+
+    Guarda as linhas com quantidade física ordenadas pela data da última compra, com as datas
+    e a quantidade física e o valor em estoque acumulados nessa ordem: as linhas compradas até
+    uma data são um prefixo (busca binária) e os totais de uma faixa de datas, uma subtração.
+    Não depende de 'hoje': é montado uma vez por df filtrado; devolve {'linhas', 'datas',
+    'fisica_acumulada', 'valor_acumulado'}.
+    """
+    fisica = df['quantidade fisica'].to_numpy()
+    com_fisica = np.flatnonzero(fisica > 0)
+    datas = df[COLUNA_DATA].to_numpy()[com_fisica]
+    ordem = np.argsort(datas, kind='stable')
+    linhas = com_fisica[ordem]
+    fisica = fisica[linhas].astype('int64')
+    valor = fisica * custo_arredondado(df['custo liquido entrada'].to_numpy()[linhas])
+    return {
+        'linhas': linhas,
+        'datas': datas[ordem],
+        # Com um zero na frente: o total das k primeiras linhas é acumulado[k]
+        'fisica_acumulada': np.r_[0, np.cumsum(fisica)],
+        'valor_acumulado': np.r_[0.0, np.cumsum(valor)],
+    }
+
+
+def _comprados_ate(indice, hoje, dias):
+    # Quantas linhas do índice têm pelo menos 'dias' dias desde a última compra (contados até 'hoje')
+    data_limite = (pd.Timestamp(hoje) - pd.Timedelta(days=dias)).to_datetime64()
+    return int(np.searchsorted(indice['datas'], data_limite, side='right'))
+
+
+def estoque_parado(df, hoje, limite_dias_compra, indice=None):
+    """Linhas com quantidade física e última compra há mais de limite_dias_compra dias (contados até 'hoje').
+
+    Com 'indice' (indexar_idade(df)), as linhas saem de uma busca binária, sem percorrer df inteiro.
+    """
+    if indice is not None:
+        linhas = indice['linhas'][:_comprados_ate(indice, hoje, limite_dias_compra + 1)]
+        df_parado = df.iloc[linhas, df.columns.get_indexer(COLUNAS_ESTOQUE_PARADO)]
+        return df_parado.assign(
+            dias_desde_ultima_compra=(pd.Timestamp(hoje) - df_parado['data ultima compra']).dt.days)
+    dias_desde_ultima_compra = (pd.Timestamp(hoje) - df['data ultima compra']).dt.days
+    mascara = (dias_desde_ultima_compra > limite_dias_compra) & (df['quantidade fisica'] > 0)
+    return df.loc[mascara, COLUNAS_ESTOQUE_PARADO].assign(
+        dias_desde_ultima_compra=dias_desde_ultima_compra[mascara]
+    ).sort_values(by='dias_desde_ultima_compra', ascending=False, kind='stable')
+
+
+def valor_por_faixa_de_idade(df, hoje, indice=None, faixas_dias=FAIXAS_IDADE_DIAS):
+    """Quantidade física e valor em estoque por faixa de dias desde a última compra (contados até 'hoje').
+
+    Devolve uma linha por faixa, da mais recente à mais antiga, com 'faixa_idade',
+    'quantidade_fisica' e 'valor_estoque'. Com 'indice' (indexar_idade(df)), os totais saem
+    dos acumulados do índice, sem percorrer df.
+    """
+    if indice is None:
+        indice = indexar_idade(df)
+    # Linhas com pelo menos cada limite de dias; a primeira faixa vai até o fim (compras mais recentes)
+    cortes = [len(indice['linhas'])] + [_comprados_ate(indice, hoje, dias) for dias in faixas_dias] + [0]
+    rotulos = ([f'Menos de {faixas_dias[0]} dias']
+               + [f'{inicio} a {fim - 1} dias' for inicio, fim in zip(faixas_dias, faixas_dias[1:])]
+               + [f'{faixas_dias[-1]} dias ou mais'])
+    fisica, valor = indice['fisica_acumulada'], indice['valor_acumulado']
+    return pd.DataFrame({
+        'faixa_idade': rotulos,
+        'quantidade_fisica': [int(fisica[fim] - fisica[inicio]) for fim, inicio in zip(cortes, cortes[1:])],
+        'valor_estoque': [float(valor[fim] - valor[inicio]) for fim, inicio in zip(cortes, cortes[1:])],
+    })
+
+
+def produtos_criticos(df, limite_disponivel, indice=None):
+    """Linhas com disponibilidade abaixo do limite e alguma solicitação, das mais solicitadas às menos.
+
+    Com 'indice' (indexar_disponibilidade(df)), não percorre nem ordena df inteiro.
+    """
+    if indice is not None:
+        posicoes = _linhas_por_solicitada(indice, None, limite_disponivel)
+        posicoes = posicoes[:np.searchsorted(posicoes, indice['com_solicitacao'])]
+        return _selecionar_linhas(df, indice['ordem_solicitada'][posicoes], COLUNAS_CRITICOS)
+    mascara = (df['quantidade disponivel'] < limite_disponivel) & (df['quantidade solicitada'] > 0)
+    return df.loc[mascara, COLUNAS_CRITICOS].sort_values(by='quantidade solicitada', ascending=False, kind='stable')
+
+
+def grafico_criticos(df_criticos, top_n):
+    """Disponível e solicitado dos top_n produtos críticos mais solicitados, com os demais em 'Outros'."""
+    return top_n_com_outros(df_criticos, 'produto', ['quantidade disponivel', 'quantidade solicitada'],
+                            coluna_ordem='quantidade solicitada', n=top_n)
+
+
+def desempenho_por_fabricante(df_totais_fabricante):
+    """Métricas por fabricante (sem o valor em estoque), da maior quantidade física para a menor."""
+    return df_totais_fabricante.drop(columns='valor_estoque').sort_values(by='total_quantidade_fisica',
+                                                                          ascending=False)
+
+
+def calcular_em_paralelo(tarefas, executor=None):
+    """Executa as funções (sem argumentos) de 'tarefas' ao mesmo tempo e devolve {nome: resultado}.
+
+    As análises são independentes entre si e só leem os dados, então podem rodar em threads:
+    boa parte dos groupby/sort do pandas libera o GIL. Threads, e não processos, para não
+    copiar o DataFrame para cada processo. Sem 'executor', roda uma tarefa após a outra.
+    O resultado segue a ordem de 'tarefas'; a primeira exceção de uma tarefa é repassada.
+    """
+    if executor is None:
+        return {nome: tarefa() for nome, tarefa in tarefas.items()}
+    futuros = {nome: executor.submit(tarefa) for nome, tarefa in tarefas.items()}
+    return {nome: futuro.result() for nome, futuro in futuros.items()}
+
+
+def calcular_analises(dados, filtros=None, parametros=None, hoje=None, executor=None):
+    """Todas as análises do painel para os filtros (argumentos de aplicar_filtros) e parâmetros dados.
+
+    Parâmetros ausentes usam PARAMETROS_PADRAO; 'hoje' (data de referência do estoque
+    parado) usa a data atual. Com 'executor' (ex.: ThreadPoolExecutor), as análises rodam em
+    paralelo (ver calcular_em_paralelo). Devolve um dicionário com um resultado por análise.
+    """
+    parametros = {**PARAMETROS_PADRAO, **(parametros or {})}
+    hoje = hoje or datetime.date.today()
+    filtrado = aplicar_filtros(dados, **(filtros or {}))
+    df_filtrado, df_totais_fabricante = filtrado['df'], filtrado['totais_fabricante']
+
+    def criticos_e_grafico():
+        df_criticos = produtos_criticos(df_filtrado, parametros['limite_critico'])
+        return df_criticos, grafico_criticos(df_criticos, parametros['top_n_criticos'])
+
+    resultados = calcular_em_paralelo({
+        'top_fabricantes': lambda: top_fabricantes(df_totais_fabricante),
+        'resumo_quantidades': lambda: resumo_quantidades(filtrado['cubo']),
+        'baixa_disponibilidade': lambda: baixa_disponibilidade(df_filtrado, parametros['limite_disponibilidade']),
+        'avarias': lambda: avarias(df_filtrado),
+        'estoque_parado': lambda: estoque_parado(df_filtrado, hoje, parametros['limite_dias_compra']),
+        'valor_por_faixa_de_idade': lambda: valor_por_faixa_de_idade(df_filtrado, hoje),
+        'produtos_criticos': criticos_e_grafico,
+        'desempenho_fabricante': lambda: desempenho_por_fabricante(df_totais_fabricante),
+    }, executor)
+    df_criticos, df_grafico_criticos = resultados.pop('produtos_criticos')
+    return {'indicadores': filtrado['indicadores'], **resultados, 'produtos_criticos': df_criticos, 'grafico_criticos': df_grafico_criticos}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Calcula as análises do painel e grava cada uma em CSV.')
+    parser.add_argument('caminho_csv', nargs='?', default='df_estoque.csv')
+    parser.add_argument('--ano', type=int)
+    parser.add_argument('--mes', type=int, help='1-12 (exige --ano)')
+    parser.add_argument('--data-inicial', type=datetime.date.fromisoformat, help='AAAA-MM-DD')
+    parser.add_argument('--data-final', type=datetime.date.fromisoformat, help='AAAA-MM-DD')
+    parser.add_argument('--data-referencia', type=datetime.date.fromisoformat,
+                        help='AAAA-MM-DD: data até a qual a idade do estoque é contada (padrão: hoje)')
+    parser.add_argument('-o', '--saida', default='analises', help='diretório dos CSVs (padrão: analises/)')
+    parser.add_argument('--paralelo', type=int, default=0, metavar='THREADS',
+                        help='calcula as análises em paralelo com este número de threads (padrão: em sequência)')
+    for nome, valor in PARAMETROS_PADRAO.items():
+        parser.add_argument('--' + nome.replace('_', '-'), type=int, default=valor)
+    args = parser.parse_args()
+    if args.mes is not None and args.ano is None:
+        parser.error('--mes exige --ano')
+
+    with concurrent.futures.ThreadPoolExecutor(args.paralelo) if args.paralelo else contextlib.nullcontext() as executor:
+        resultados = calcular_analises(
+            montar_dados(args.caminho_csv),
+            filtros=dict(ano=args.ano, mes=args.mes, data_inicial=args.data_inicial, data_final=args.data_final),
+            parametros={nome: getattr(args, nome) for nome in PARAMETROS_PADRAO},
+            hoje=args.data_referencia,
+            executor=executor,
+        )
+    os.makedirs(args.saida, exist_ok=True)
+    for nome, resultado in resultados.items():
+        if isinstance(resultado, dict):
+            resultado = pd.DataFrame([resultado])
+        resultado.to_csv(os.path.join(args.saida, f'{nome}.csv'), index=False)
+        print(f'{nome}: {len(resultado)} linha(s)')
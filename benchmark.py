@@ -0,0 +1,258 @@
+"""Benchmark do carregamento, dos filtros e das seções do painel com exportações sintéticas.
+
+Gera arquivos com o mesmo esquema de df_estoque.csv, no tamanho e na cardinalidade pedidos,
+mede cada etapa sem o Streamlit e grava um relatório JSON. Com --comparar, aponta as etapas
+que ficaram mais lentas que num relatório anterior (e termina com código 1):
+
+    python benchmark.py --linhas 100000 1000000 -o relatorio.json
+    python benchmark.py --linhas 100000 1000000 -o novo.json --comparar relatorio.json
+
+Os dados dependem só dos parâmetros e da semente, então duas execuções medem os mesmos arquivos.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from agregados import construir_cubo, metricas_da_fatia
+from analises import (PARAMETROS_PADRAO, aplicar_filtros, top_fabricantes, resumo_quantidades, baixa_disponibilidade,
+                      avarias, estoque_parado, produtos_criticos, grafico_criticos, desempenho_por_fabricante,
+                      indexar_disponibilidade, indexar_idade, valor_por_faixa_de_idade)
+from dados import (COLUNAS_ESTOQUE, FORMATO_DATA, feather, ler_csv_estoque, preparar_estoque, caminho_snapshot,
+                   gerar_snapshot, ler_snapshot, indexar_periodos)
+from formatacao import formatar_moeda_serie
+from medicao import medir, iniciar_execucao
+
+VERSAO_RELATORIO = 1
+
+USUARIOS = ['ADMIN', 'YAGO', 'VALDEMAR', 'NATALIA', 'TAMIRIS', 'COMPRAS']
+
+
+def gerar_estoque_sintetico(linhas, produtos=None, fabricantes=200, ano_inicial=2023, ano_final=2025, semente=0):
+    """Exportação sintética com as colunas e os formatos de df_estoque.csv (datas em texto DD/MM/AAAA).
+
+    'produtos' é o número de produtos distintos (padrão: ~88% das linhas, como no arquivo real);
+    cada produto pertence a um único fabricante. As distribuições imitam o arquivo real:
+    quantidades concentradas em valores baixos, a maioria sem solicitação e avarias raras.
+    """
+    gerador = np.random.default_rng(semente)
+    produtos = produtos or max(1, int(linhas * 0.88))
+
+    fabricante_do_produto = gerador.integers(0, fabricantes, produtos)
+    id_produto = gerador.integers(0, produtos, linhas)
+    nomes_produtos = pd.Series(np.arange(produtos)).astype('string').str.zfill(7).radd('PRODUTO ')
+    nomes_fabricantes = pd.Series(np.arange(fabricantes)).astype('string').str.zfill(4).radd('FABRICANTE ')
+
+    quantidade_fisica = np.floor(gerador.lognormal(4, 2, linhas)).clip(0, 2_000_000).astype('int64')
+    quantidade_reservada = np.where(gerador.random(linhas) < 0.02, gerador.integers(0, 700, linhas), 0)
+    quantidade_reservada = np.minimum(quantidade_reservada, quantidade_fisica)
+    quantidade_solicitada = np.where(gerador.random(linhas) < 0.25,
+                                     np.floor(gerador.lognormal(5, 2, linhas)).clip(1, 1_000_000), 0).astype('int64')
+    quantidade_avariada = (gerador.random(linhas) < 0.005).astype('int64')
+    custo = np.round(gerador.lognormal(1.8, 1.2, linhas), 2)
+
+    primeiro_dia = np.datetime64(f'{ano_inicial}-01-01')
+    total_dias = (np.datetime64(f'{ano_final + 1}-01-01') - primeiro_dia).astype('int64')
+    datas = pd.DatetimeIndex(primeiro_dia + gerador.integers(0, total_dias, linhas).astype('timedelta64[D]'))
+
+    df = pd.DataFrame({
+        'produto': nomes_produtos.to_numpy()[id_produto],
+        'fabricante': nomes_fabricantes.to_numpy()[fabricante_do_produto[id_produto]],
+        'quantidade fisica': quantidade_fisica,
+        'quantidade solicitada': quantidade_solicitada,
+        'quantidade avariada': quantidade_avariada,
+        'quantidade reservada': quantidade_reservada,
+        'quantidade disponivel': quantidade_fisica - quantidade_reservada,
+        'custo liquido entrada': custo,
+        'preco venda': np.round(custo * gerador.uniform(1.1, 1.6, linhas), 2),
+        'custo entrada anterior': np.round(custo * gerador.uniform(0.8, 1.1, linhas), 2),
+        'data ultima compra': datas.strftime(FORMATO_DATA),
+        'usuario': np.array(USUARIOS)[gerador.integers(0, len(USUARIOS), linhas)],
+        'Mes': datas.month,
+        'Ano': datas.year,
+    })
+    return df[COLUNAS_ESTOQUE]
+
+
+def _medir_repetindo(etapa, funcao, repeticoes, linhas=None):
+    """Executa funcao 'repeticoes' vezes, cada uma medida com medicao.medir; devolve o último resultado."""
+    for _ in range(repeticoes):
+        with medir(etapa, linhas=linhas):
+            resultado = funcao()
+    return resultado
+
+
+def _filtros(df, indice_periodos):
+    """Filtros equivalentes aos do painel: tudo, último ano, último mês e um intervalo de datas parcial."""
+    ultimo_ano, ultimo_mes = max(indice_periodos)
+    datas = df['data ultima compra']
+    quartil_inicial, quartil_final = datas.iloc[len(df) // 4], datas.iloc[3 * len(df) // 4]
+    return {
+        'todos': {},
+        'ultimo_ano': dict(ano=ultimo_ano),
+        'ultimo_mes': dict(ano=ultimo_ano, mes=ultimo_mes),
+        'intervalo_datas': dict(data_inicial=quartil_inicial.date(), data_final=quartil_final.date()),
+    }
+
+
+def medir_cenario(caminho_csv, repeticoes=3, hoje=None):
+    """Mede carga, filtros e seções para um arquivo; devolve a lista de medições (uma por repetição)."""
+    medicoes = iniciar_execucao()
+
+    df, _ = _medir_repetindo('carga.ler_csv', lambda: ler_csv_estoque(caminho_csv), repeticoes)
+    for medicao in medicoes:
+        medicao['linhas'] = len(df)
+    df = _medir_repetindo('carga.preparar', lambda: preparar_estoque(df.copy()), repeticoes, len(df))
+    if feather is not None:
+        caminho_feather = caminho_snapshot(caminho_csv)
+        _medir_repetindo('carga.gerar_snapshot', lambda: gerar_snapshot(caminho_csv, caminho_feather), 1, len(df))
+        _medir_repetindo('carga.ler_snapshot', lambda: ler_snapshot(caminho_feather), repeticoes, len(df))
+    indice_periodos = _medir_repetindo('carga.indexar_periodos', lambda: indexar_periodos(df), repeticoes, len(df))
+    cubo = _medir_repetindo('carga.construir_cubo', lambda: construir_cubo(df), repeticoes, len(df))
+
+    dados = {'df': df, 'cubo': cubo, 'indice_periodos': indice_periodos}
+    parametros = PARAMETROS_PADRAO
+    hoje = hoje or (df['data ultima compra'].iloc[-1] + pd.Timedelta(days=1)).date()
+    for nome, filtro in _filtros(df, indice_periodos).items():
+        filtrado = _medir_repetindo(f'{nome}/filtros', lambda: aplicar_filtros(dados, **filtro), repeticoes, len(df))
+        df_filtrado, cubo_filtrado, df_totais_fabricante = filtrado['df'], filtrado['cubo'], filtrado['totais_fabricante']
+        if df_filtrado.empty:
+            continue
+        linhas = len(df_filtrado)
+
+        def etapa(nome_etapa, funcao):
+            return _medir_repetindo(f'{nome}/{nome_etapa}', funcao, repeticoes, linhas)
+
+        etapa('visao_geral.metricas_da_fatia', lambda: metricas_da_fatia(cubo_filtrado))
+        etapa('visao_geral.top10_fabricantes', lambda: top_fabricantes(df_totais_fabricante, 10))
+        etapa('visao_geral.formatar_moeda', lambda: formatar_moeda_serie(df_totais_fabricante['valor_estoque']))
+        etapa('secao1.resumo_quantidades', lambda: resumo_quantidades(cubo_filtrado))
+        indice = etapa('secao1.indexar_disponibilidade', lambda: indexar_disponibilidade(df_filtrado))
+        etapa('secao1.baixa_disponibilidade',
+              lambda: baixa_disponibilidade(df_filtrado, parametros['limite_disponibilidade'], indice))
+        etapa('secao2.avarias', lambda: avarias(df_filtrado))
+        indice_idade = etapa('secao3.indexar_idade', lambda: indexar_idade(df_filtrado))
+        etapa('secao3.estoque_parado',
+              lambda: estoque_parado(df_filtrado, hoje, parametros['limite_dias_compra'], indice_idade))
+        etapa('secao3.valor_por_faixa_de_idade', lambda: valor_por_faixa_de_idade(df_filtrado, hoje, indice_idade))
+        df_criticos = etapa('secao4.produtos_criticos',
+                            lambda: produtos_criticos(df_filtrado, parametros['limite_critico'], indice))
+        etapa('secao4.grafico_criticos', lambda: grafico_criticos(df_criticos, parametros['top_n_criticos']))
+        etapa('secao5.desempenho_fabricante', lambda: desempenho_por_fabricante(df_totais_fabricante))
+    return medicoes
+
+
+def resumir_medicoes(medicoes):
+    """Agrupa as repetições de cada etapa: {etapa: {linhas, repeticoes, min_ms, mediana_ms, media_ms}}."""
+    por_etapa = {}
+    for medicao in medicoes:
+        por_etapa.setdefault(medicao['etapa'], []).append(medicao)
+    return {
+        etapa: {
+            'linhas': lista[-1]['linhas'],
+            'repeticoes': len(lista),
+            'min_ms': min(m['ms'] for m in lista),
+            'mediana_ms': statistics.median(m['ms'] for m in lista),
+            'media_ms': round(statistics.fmean(m['ms'] for m in lista), 3),
+        }
+        for etapa, lista in por_etapa.items()
+    }
+
+
+def _ambiente():
+    versoes = {'python': platform.python_version(), 'pandas': pd.__version__, 'numpy': np.__version__}
+    try:
+        import pyarrow
+        versoes['pyarrow'] = pyarrow.__version__
+    except ImportError:
+        versoes['pyarrow'] = None
+    return {**versoes, 'plataforma': platform.platform(), 'processador': platform.processor(),
+            'nucleos': os.cpu_count()}
+
+
+def executar_benchmark(escalas, produtos=None, fabricantes=200, repeticoes=3, semente=0, diretorio=None):
+    """Gera uma exportação por escala (número de linhas), mede cada uma e devolve o relatório."""
+    relatorio = {
+        'versao': VERSAO_RELATORIO,
+        'criado_em': datetime.datetime.now().isoformat(timespec='seconds'),
+        'ambiente': _ambiente(),
+        'parametros': {'produtos': produtos, 'fabricantes': fabricantes, 'repeticoes': repeticoes, 'semente': semente},
+        'cenarios': {},
+    }
+    with tempfile.TemporaryDirectory() as diretorio_temporario:
+        diretorio = diretorio or diretorio_temporario
+        for linhas in escalas:
+            caminho_csv = os.path.join(diretorio, f'estoque_sintetico_{linhas}.csv')
+            df = gerar_estoque_sintetico(linhas, produtos, fabricantes, semente=semente)
+            df.to_csv(caminho_csv, index=False)
+            nome = f'{linhas}_linhas'
+            print(f'{nome}: {df["produto"].nunique()} produtos, {df["fabricante"].nunique()} fabricantes', file=sys.stderr)
+            relatorio['cenarios'][nome] = resumir_medicoes(medir_cenario(caminho_csv, repeticoes))
+    return relatorio
+
+
+def comparar_relatorios(anterior, atual, tolerancia=0.2, minimo_ms=10.0):
+    """Etapas cujo menor tempo (min_ms) cresceu mais que 'tolerancia' (fração) em relação ao relatório anterior.
+
+    O menor tempo é o menos sujeito a ruído (outros processos, coleta de lixo, cache frio); a
+    mediana de poucas repetições oscila mais que a tolerância. Etapas abaixo de minimo_ms nos
+    dois relatórios e etapas medidas uma vez só, em qualquer dos relatórios, são ignoradas.
+    Retorna uma lista de (cenario, etapa, min_anterior, min_atual).
+    """
+    regressoes = []
+    for cenario, etapas in atual['cenarios'].items():
+        for etapa, resultado in etapas.items():
+            resultado_anterior = anterior['cenarios'].get(cenario, {}).get(etapa)
+            if resultado_anterior is None:
+                continue
+            if min(resultado_anterior['repeticoes'], resultado['repeticoes']) < 2:
+                continue
+            antes, depois = resultado_anterior['min_ms'], resultado['min_ms']
+            if max(antes, depois) >= minimo_ms and depois > antes * (1 + tolerancia):
+                regressoes.append((cenario, etapa, antes, depois))
+    return regressoes
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Mede carga, filtros e seções do painel com exportações sintéticas.')
+    parser.add_argument('--linhas', type=int, nargs='+', default=[100_000], help='escalas (linhas por arquivo)')
+    parser.add_argument('--produtos', type=int, help='produtos distintos (padrão: ~88%% das linhas)')
+    parser.add_argument('--fabricantes', type=int, default=200)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--diretorio', help='onde gravar os arquivos sintéticos (padrão: diretório temporário)')
+    parser.add_argument('-o', '--saida', default='benchmark.json', help='relatório JSON')
+    parser.add_argument('--comparar', help='relatório anterior para detectar regressões')
+    parser.add_argument('--tolerancia', type=float, default=0.2, help='aumento aceito no menor tempo (padrão: 0.2 = 20%%)')
+    parser.add_argument('--minimo-ms', type=float, default=10.0, help='etapas mais rápidas que isso não são comparadas')
+    args = parser.parse_args()
+
+    relatorio = executar_benchmark(args.linhas, args.produtos, args.fabricantes, args.repeticoes,
+                                   args.semente, args.diretorio)
+    with open(args.saida, 'w', encoding='utf-8') as arquivo:
+        json.dump(relatorio, arquivo, ensure_ascii=False, indent=2)
+    print(f'Relatório gravado em {args.saida}.')
+
+    for cenario, etapas in relatorio['cenarios'].items():
+        print(f'\n{cenario}')
+        for etapa, resultado in sorted(etapas.items(), key=lambda item: -item[1]['mediana_ms']):
+            print(f'  {etapa:<45} {resultado["mediana_ms"]:>10.1f} ms')
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as arquivo:
+            anterior = json.load(arquivo)
+        if args.repeticoes < 2:
+            print('\nCom --repeticoes 1 nenhuma etapa é comparada: uma medição só não separa regressão de ruído.')
+        regressoes = comparar_relatorios(anterior, relatorio, args.tolerancia, args.minimo_ms)
+        for cenario, etapa, antes, depois in regressoes:
+            print(f'REGRESSÃO {cenario} {etapa}: {antes:.1f} ms -> {depois:.1f} ms')
+        if regressoes:
+            sys.exit(1)
+        print(f'\nNenhuma etapa mais de {args.tolerancia:.0%} mais lenta que em {args.comparar}.')
@@ -0,0 +1,129 @@
+"""Cache de resultados em disco, que sobrevive a reinícios do servidor. Sem dependência do Streamlit.
+
+    cache = CacheEmDisco('.cache_estoque', limite_bytes=256 * 1024 * 1024)
+    df_resumo = cache.obter(('resumo_quantidades', versao, inicio, fim), lambda: resumo_quantidades(cubo))
+
+Cada resultado é um arquivo pickle cujo nome é o hash da chave; a chave deve identificar a
+versão dos dados, a análise e os parâmetros, e ter um repr estável entre execuções (tuplas de
+textos, números e datas). A gravação é atômica (temporário + renomeação) e, quando o diretório
+passa de limite_bytes, os resultados usados há mais tempo são apagados primeiro.
+"""
+import hashlib
+import os
+import pickle
+import threading
+
+import pandas as pd
+
+EXTENSAO = '.pkl'
+
+
+def _compactar(resultado):
+    """Cópia do resultado sem as categorias não usadas das colunas categóricas.
+
+    Um resultado pequeno de uma coluna categórica carregaria a tabela inteira de nomes
+    (todos os produtos do arquivo) para o disco; só os nomes presentes são gravados.
+    Percorre também tuplas, listas e dicionários (ex.: indicadores e totais por fabricante).
+    """
+    if isinstance(resultado, pd.DataFrame):
+        categoricas = [coluna for coluna, tipo in resultado.dtypes.items() if isinstance(tipo, pd.CategoricalDtype)]
+        if not categoricas:
+            return resultado
+        return resultado.assign(**{coluna: resultado[coluna].cat.remove_unused_categories() for coluna in categoricas})
+    if isinstance(resultado, (tuple, list)):
+        return type(resultado)(_compactar(item) for item in resultado)
+    if isinstance(resultado, dict):
+        return {chave: _compactar(valor) for chave, valor in resultado.items()}
+    return resultado
+
+
+class CacheEmDisco:
+    """Resultados guardados em arquivos de um diretório, com despejo pelo uso menos recente (LRU)."""
+
+    def __init__(self, diretorio, limite_bytes):
+        self.diretorio = diretorio
+        self.limite_bytes = limite_bytes
+        self._trava_despejo = threading.Lock()
+        os.makedirs(diretorio, exist_ok=True)
+
+    def _caminho(self, chave):
+        nome = hashlib.sha256(repr(chave).encode('utf-8')).hexdigest()
+        return os.path.join(self.diretorio, nome + EXTENSAO)
+
+    def ler(self, chave):
+        """(True, resultado) se a chave está no cache, senão (False, None)."""
+        caminho = self._caminho(chave)
+        try:
+            with open(caminho, 'rb') as arquivo:
+                resultado = pickle.load(arquivo)
+        except FileNotFoundError:
+            return False, None
+        except Exception:
+            # Arquivo ilegível (gravado por outra versão das bibliotecas, por exemplo): vira um erro de cache
+            self._remover(caminho)
+            return False, None
+        # A data de modificação marca o último uso, para o despejo
+        try:
+            os.utime(caminho)
+        except FileNotFoundError:
+            pass
+        return True, resultado
+
+    def gravar(self, chave, resultado):
+        """Grava o resultado (substituindo o anterior) e despeja os mais antigos se passar do limite."""
+        caminho = self._caminho(chave)
+        # Temporário próprio de cada processo/thread, renomeado de uma vez: quem lê nunca vê um arquivo pela metade
+        caminho_temporario = f'{caminho}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(caminho_temporario, 'wb') as arquivo:
+                pickle.dump(_compactar(resultado), arquivo, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(caminho_temporario, caminho)
+        except OSError:
+            # Disco cheio ou sem permissão: o resultado continua válido, só não fica guardado
+            self._remover(caminho_temporario)
+            return
+        self._despejar()
+
+    def obter(self, chave, calcular):
+        """Resultado guardado para a chave; se não houver, calcula com calcular(), grava e devolve."""
+        encontrado, resultado = self.ler(chave)
+        if not encontrado:
+            resultado = calcular()
+            self.gravar(chave, resultado)
+        return resultado
+
+    def limpar(self):
+        """Apaga todos os resultados guardados."""
+        for caminho, _, _ in self._arquivos():
+            self._remover(caminho)
+
+    def _arquivos(self):
+        arquivos = []
+        with os.scandir(self.diretorio) as entradas:
+            for entrada in entradas:
+                if not entrada.name.endswith(EXTENSAO):
+                    continue
+                try:
+                    info = entrada.stat()
+                except FileNotFoundError:
+                    continue
+                arquivos.append((entrada.path, info.st_mtime_ns, info.st_size))
+        return arquivos
+
+    def _despejar(self):
+        with self._trava_despejo:
+            arquivos = self._arquivos()
+            total = sum(tamanho for _, _, tamanho in arquivos)
+            # Do uso mais antigo para o mais recente, até caber no limite
+            for caminho, _, tamanho in sorted(arquivos, key=lambda arquivo: arquivo[1]):
+                if total <= self.limite_bytes:
+                    break
+                self._remover(caminho)
+                total -= tamanho
+
+    @staticmethod
+    def _remover(caminho):
+        try:
+            os.remove(caminho)
+        except FileNotFoundError:
+            pass
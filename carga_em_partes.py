@@ -0,0 +1,108 @@
+"""Carga do estoque em partes, para exportações maiores que a memória. Sem dependência do Streamlit.
+
+O CSV é lido em blocos (dados.ler_csv_em_partes) e, de cada bloco, ficam só:
+
+- o cubo de agregados por (ano, mês, fabricante, produto), somado bloco a bloco, que
+  responde aos indicadores, ao top de fabricantes e às seções 1 (resumo) e 5;
+- para cada mês, listas com as LINHAS_POR_LISTA linhas que encabeçam as seções de linhas:
+  baixa disponibilidade e produtos críticos (as mais solicitadas, para cada valor de
+  'quantidade disponivel' abaixo de LIMITE_DISPONIVEL_MAXIMO), avarias (as mais avariadas)
+  e estoque parado (as compras mais antigas com quantidade física).
+
+As linhas das listas, juntas, fazem o papel de df_estoque: as funções de analises.py rodam
+sobre elas sem mudanças, e as primeiras LINHAS_POR_LISTA linhas de cada resultado são as
+mesmas da carga completa (para limites de disponibilidade até LIMITE_DISPONIVEL_MAXIMO).
+"""
+import io
+
+import pandas as pd
+
+from agregados import construir_cubo, acrescentar_ao_cubo
+from dados import (BYTES_POR_PARTE, COLUNA_DATA, COLUNAS_ESTOQUE, adicionar_colunas_de_periodo,
+                   alinhar_categorias, indexar_periodos, ler_csv_em_partes, ler_csv_estoque, ordenar_por_data)
+
+LINHAS_POR_LISTA = 100
+LIMITE_DISPONIVEL_MAXIMO = 50
+
+LISTAS = ['baixa_disponibilidade', 'criticos', 'avarias', 'estoque_parado']
+
+PERIODO = ['ano_compra', 'mes_compra']
+
+
+def _primeiras(df, coluna_ordem, crescente, chaves, linhas_por_lista):
+    """As linhas_por_lista primeiras linhas de cada grupo de 'chaves', na ordem de coluna_ordem."""
+    ordenado = df.sort_values(coluna_ordem, ascending=crescente, kind='stable')
+    return ordenado.groupby(chaves, observed=True, sort=False).head(linhas_por_lista)
+
+
+def _lista(nome, df, linhas_por_lista, limite_disponivel_maximo):
+    """Linhas de df que encabeçam a lista 'nome' em cada mês (df pode ser uma lista anterior mais linhas novas)."""
+    disponivel = df['quantidade disponivel']
+    if nome == 'avarias':
+        return _primeiras(df[df['quantidade avariada'] > 0], 'quantidade avariada', False, PERIODO, linhas_por_lista)
+    if nome == 'estoque_parado':
+        return _primeiras(df[df['quantidade fisica'] > 0], COLUNA_DATA, True, PERIODO, linhas_por_lista)
+
+    if nome == 'baixa_disponibilidade':
+        mascara = (disponivel >= 0) & (disponivel < limite_disponivel_maximo)
+    else:
+        mascara = (disponivel < limite_disponivel_maximo) & (df['quantidade solicitada'] > 0)
+    # Uma lista por valor de disponibilidade, para valer com qualquer limite até limite_disponivel_maximo;
+    # as disponibilidades negativas entram em qualquer limite e formam um único grupo
+    grupo_disponivel = disponivel[mascara].clip(lower=-1).rename('grupo_disponivel')
+    return _primeiras(df[mascara], 'quantidade solicitada', False, PERIODO + [grupo_disponivel], linhas_por_lista)
+
+
+def montar_dados_em_partes(caminho_arquivo, linhas_por_lista=LINHAS_POR_LISTA,
+                           limite_disponivel_maximo=LIMITE_DISPONIVEL_MAXIMO, bytes_por_parte=BYTES_POR_PARTE):
+    """Versão em partes de analises.montar_dados: mesmo formato de retorno, sem ter o arquivo inteiro em memória.
+
+    'df' traz só as linhas das listas (ordenadas pela data) e a chave 'em_partes' descreve o
+    que foi guardado: {'total_linhas', 'linhas_por_lista', 'limite_disponivel_maximo'}.
+    O cubo só tem granularidade mensal, então os filtros por intervalo de datas não se aplicam.
+    """
+    cubo = None
+    listas = None
+    rejeitadas = []
+    total_linhas = 0
+
+    for df_parte, df_rejeitadas in ler_csv_em_partes(caminho_arquivo, bytes_por_parte):
+        rejeitadas.append(df_rejeitadas)
+        if df_parte.empty:
+            continue
+        # O índice numera as linhas válidas do arquivo inteiro: identifica uma linha presente em várias listas
+        df_parte.index += total_linhas
+        total_linhas += len(df_parte)
+        df_parte = adicionar_colunas_de_periodo(df_parte)
+
+        cubo = construir_cubo(df_parte) if cubo is None else acrescentar_ao_cubo(cubo, df_parte)
+        listas_parte = {nome: _lista(nome, df_parte, linhas_por_lista, limite_disponivel_maximo) for nome in LISTAS}
+        if listas is None:
+            listas = listas_parte
+        else:
+            # As primeiras do arquivo até aqui estão entre as primeiras da lista anterior e as da parte
+            listas = {nome: _lista(nome, pd.concat(alinhar_categorias(listas[nome], listas_parte[nome])),
+                                   linhas_por_lista, limite_disponivel_maximo)
+                      for nome in LISTAS}
+
+    if listas is None:
+        # Nenhuma linha válida: df vazio (com as colunas e os tipos do esquema) e as rejeitadas,
+        # como em analises.montar_dados, para o painel mostrar o aviso e as linhas desconsideradas
+        df, sem_rejeitadas = ler_csv_estoque(io.BytesIO(','.join(COLUNAS_ESTOQUE).encode('utf-8') + b'\n'))
+        rejeitadas.append(sem_rejeitadas)
+        df = adicionar_colunas_de_periodo(df)
+        cubo = construir_cubo(df)
+    else:
+        df = pd.concat(alinhar_categorias(*listas.values()))
+        df = ordenar_por_data(df[~df.index.duplicated()].sort_index())
+    return {
+        'df': df,
+        'rejeitadas': pd.concat(rejeitadas),
+        'cubo': cubo,
+        'indice_periodos': indexar_periodos(df),
+        'em_partes': {
+            'total_linhas': total_linhas,
+            'linhas_por_lista': linhas_por_lista,
+            'limite_disponivel_maximo': limite_disponivel_maximo,
+        },
+    }
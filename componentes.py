@@ -0,0 +1,100 @@
+"""Componentes de interface reutilizados pelas seções do painel."""
+import math
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+from formatacao import formatar_inteiro
+from medicao import medir
+
+LINHAS_POR_PAGINA = 100
+
+ORDEM_ORIGINAL = '(ordem original)'
+
+
+def filtrar_por_busca(df, busca, colunas_busca):
+    """Linhas em que alguma de colunas_busca contém o texto buscado (sem diferenciar maiúsculas)."""
+    if not busca:
+        return df
+    encontrados = pd.Series(False, index=df.index)
+    for coluna in colunas_busca:
+        valores = df[coluna]
+        if isinstance(valores.dtype, pd.CategoricalDtype):
+            # Busca nos nomes das categorias (cada um uma vez) e filtra as linhas pelos códigos
+            categorias = valores.cat.categories.to_series().astype('string')
+            codigos = np.flatnonzero(categorias.str.contains(busca, case=False, regex=False).fillna(False))
+            encontrados |= valores.cat.codes.isin(codigos)
+        else:
+            encontrados |= valores.astype('string').str.contains(busca, case=False, regex=False).fillna(False)
+    return df[encontrados]
+
+
+def pagina_ordenada(df, coluna_ordem=None, crescente=True, pagina=1, linhas_por_pagina=LINHAS_POR_PAGINA):
+    """Linhas da página pedida (a partir de 1), com df ordenado por coluna_ordem (None mantém a ordem).
+
+    Para colunas numéricas e datas a ordenação é parcial (nsmallest/nlargest): só as linhas
+    até o fim da página pedida são ordenadas, não a tabela inteira.
+    """
+    inicio = (pagina - 1) * linhas_por_pagina
+    fim = inicio + linhas_por_pagina
+    if coluna_ordem is not None:
+        tipo = df[coluna_ordem].dtype
+        if pd.api.types.is_numeric_dtype(tipo) or pd.api.types.is_datetime64_any_dtype(tipo):
+            df = df.nsmallest(fim, coluna_ordem) if crescente else df.nlargest(fim, coluna_ordem)
+        else:
+            df = df.sort_values(coluna_ordem, ascending=crescente, kind='stable')
+    return df.iloc[inicio:fim]
+
+
+def tabela_paginada(df, chave, colunas_busca=('produto', 'fabricante'), linhas_por_pagina=LINHAS_POR_PAGINA):
+    """Mostra df em páginas, com busca e ordenação feitas no servidor.
+
+    Só as linhas da página visível são enviadas ao navegador, então o tamanho da mensagem
+    não depende do tamanho da tabela. 'chave' identifica os widgets desta tabela.
+    Tabelas que cabem numa página são mostradas diretamente, sem os controles.
+    """
+    if len(df) <= linhas_por_pagina:
+        with medir(f'exibir_tabela.{chave}', linhas=len(df)):
+            st.dataframe(df)
+        return
+
+    colunas_busca = [coluna for coluna in colunas_busca if coluna in df.columns]
+    col_busca, col_ordem, col_sentido, col_pagina = st.columns([3, 2, 1, 1])
+
+    busca = col_busca.text_input("Buscar:", key=f"{chave}_busca",
+                                 placeholder=", ".join(colunas_busca)) if colunas_busca else ''
+    coluna_ordem = col_ordem.selectbox("Ordenar por:", [ORDEM_ORIGINAL] + list(df.columns), key=f"{chave}_ordem")
+    crescente = col_sentido.selectbox("Ordem:", ["Crescente", "Decrescente"], key=f"{chave}_sentido") == "Crescente"
+
+    df_busca = filtrar_por_busca(df, busca, colunas_busca)
+    total_paginas = max(1, math.ceil(len(df_busca) / linhas_por_pagina))
+
+    # Uma busca mais restrita pode deixar a página escolhida além da última
+    chave_pagina = f"{chave}_pagina"
+    if st.session_state.get(chave_pagina, 1) > total_paginas:
+        st.session_state[chave_pagina] = total_paginas
+    pagina = col_pagina.number_input("Página:", min_value=1, max_value=total_paginas, step=1, key=chave_pagina)
+
+    with medir(f'ordenar_tabela.{chave}', linhas=len(df)):
+        df_pagina = pagina_ordenada(df_busca, None if coluna_ordem == ORDEM_ORIGINAL else coluna_ordem,
+                                    crescente, pagina, linhas_por_pagina)
+    with medir(f'exibir_tabela.{chave}', linhas=len(df_pagina)):
+        st.dataframe(df_pagina)
+
+    inicio = (pagina - 1) * linhas_por_pagina
+    st.caption(f"Página {pagina} de {total_paginas}: linhas {formatar_inteiro(inicio + 1 if len(df_pagina) else 0)}–"
+               f"{formatar_inteiro(inicio + len(df_pagina))} de {formatar_inteiro(len(df_busca))}.")
+
+
+def grafico_barras_agrupadas(df, coluna_x, colunas_y, titulo, titulo_eixo_y='Quantidade', titulo_legenda=None):
+    """Gráfico de barras agrupadas montado direto com graph_objects: um go.Bar por coluna de colunas_y.
+
+    Evita o plotly.express, que reorganiza os dados em formato longo antes de desenhar.
+    """
+    x = df[coluna_x].astype('string').tolist()
+    fig = go.Figure([go.Bar(name=coluna, x=x, y=df[coluna].to_numpy()) for coluna in colunas_y])
+    fig.update_layout(barmode='group', title=titulo, xaxis_title=coluna_x, yaxis_title=titulo_eixo_y,
+                      legend_title_text=titulo_legenda)
+    return fig
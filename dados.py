@@ -0,0 +1,517 @@
+"""Leitura e preparação do arquivo de estoque, sem dependência do Streamlit.
+
+Também pode ser executado como script para gerar o snapshot colunar do CSV:
+
+    python dados.py df_estoque.csv
+"""
+import argparse
+import io
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    MOTOR_CSV_PADRAO = 'pyarrow'
+except ImportError:
+    pa = feather = None
+    MOTOR_CSV_PADRAO = 'c'
+
+COLUNA_DATA = 'data ultima compra'
+FORMATO_DATA = '%d/%m/%Y'
+
+# Tipos declarados para as colunas da exportação de estoque (exceto a data, tratada à parte).
+# Produto e fabricante são categóricos: cada nome é guardado uma vez e as linhas só trazem o
+# código inteiro, usado por groupby, ordenação e contagens; o texto só volta na exibição.
+ESQUEMA_ESTOQUE = {
+    'produto': 'category',
+    'fabricante': 'category',
+    'quantidade fisica': 'int32',
+    'quantidade solicitada': 'int32',
+    'quantidade avariada': 'int32',
+    'quantidade reservada': 'int32',
+    'quantidade disponivel': 'int32',
+    'custo liquido entrada': 'float32',
+    'preco venda': 'float32',
+    'custo entrada anterior': 'float32',
+    'usuario': 'category',
+    'Mes': 'int8',
+    'Ano': 'int16',
+}
+
+COLUNAS_ESTOQUE = list(ESQUEMA_ESTOQUE) + [COLUNA_DATA]
+COLUNAS_NUMERICAS = [coluna for coluna, tipo in ESQUEMA_ESTOQUE.items() if tipo.startswith(('int', 'float'))]
+# Colunas que identificam a linha nos agregados (ver agregados.CHAVES_CUBO): não podem ficar vazias
+COLUNAS_OBRIGATORIAS = ['produto', 'fabricante']
+# Colunas numéricas que o painel não usa: um campo vazio fica NaN em vez de rejeitar a linha
+COLUNAS_OPCIONAIS = ['preco venda', 'custo entrada anterior']
+
+
+def custo_arredondado(custos):
+    """Custos float32 (array ou Series) em float64, arredondados de volta aos centavos.
+
+    O float32 guarda o custo com ~7 dígitos; sem o arredondamento, o erro de cada linha
+    (até ~1e-6 por real) somado sobre milhões de linhas desvia o valor total do estoque.
+    """
+    return np.round(np.asarray(custos, dtype='float64'), 2)
+
+
+def _ler_como_texto(caminho_arquivo):
+    """Lê todas as colunas como texto, para que cada valor possa ser validado individualmente.
+
+    Usa sempre o leitor 'c': o do pyarrow recusa o arquivo inteiro por causa de uma linha com
+    campos a menos (uma linha truncada, por exemplo), e o 'c' completa essa linha com valores
+    ausentes, que a validação rejeita.
+    """
+    return pd.read_csv(caminho_arquivo, usecols=COLUNAS_ESTOQUE, dtype='string', engine='c')
+
+
+def _valores_invalidos(valores, coluna, vazios=None):
+    """Marca os valores numéricos ausentes ou que não cabem no tipo declarado (inteiros com fração ou fora da faixa).
+
+    Nas COLUNAS_OPCIONAIS só conta como inválido o que não é vazio no arquivo ('vazios'; sem
+    ela, todo valor ausente é considerado um campo vazio, como na leitura já tipada).
+    """
+    tipo = ESQUEMA_ESTOQUE[coluna]
+    invalidos = valores.isna()
+    if coluna in COLUNAS_OPCIONAIS:
+        invalidos &= False if vazios is None else ~vazios
+    if tipo.startswith('int'):
+        # Inteiros fora da faixa do tipo declarado dariam a volta na conversão final
+        limites = np.iinfo(tipo)
+        invalidos |= (valores.fillna(0) % 1 != 0) | (valores < limites.min) | (valores > limites.max)
+    return invalidos
+
+
+def _converter_numericas(df):
+    """Converte as colunas numéricas do esquema, marcando as linhas que não puderam ser convertidas."""
+    falhas = {}
+    for coluna in COLUNAS_NUMERICAS:
+        valores = pd.to_numeric(df[coluna], errors='coerce')
+        falhas[coluna] = _valores_invalidos(valores, coluna, df[coluna].isna())
+        df[coluna] = valores
+    return df, falhas
+
+
+def ler_csv_estoque(caminho_arquivo, motor=MOTOR_CSV_PADRAO):
+    """Lê o CSV de estoque (caminho ou buffer binário) aplicando ESQUEMA_ESTOQUE e o formato de data FORMATO_DATA.
+
+    Retorna (df, df_rejeitadas). As linhas que não respeitam o esquema não entram em df:
+    ficam em df_rejeitadas, com os valores originais e uma coluna 'motivo' listando as
+    colunas inválidas.
+    """
+    # Os inteiros são lidos em 64 bits (os leitores dão a volta em silêncio ao ler num tipo menor)
+    # e só são reduzidos ao tipo do esquema depois de validada a faixa
+    tipos_leitura = {coluna: 'int64' if tipo.startswith('int') else tipo for coluna, tipo in ESQUEMA_ESTOQUE.items()}
+    tipos_leitura[COLUNA_DATA] = 'string'
+    try:
+        df = pd.read_csv(caminho_arquivo, usecols=COLUNAS_ESTOQUE, dtype=tipos_leitura, engine=motor)
+        # Mesma validação da leitura como texto: o destino de uma linha não depende das outras
+        df_original = df
+        falhas = {coluna: _valores_invalidos(df[coluna], coluna) for coluna in COLUNAS_NUMERICAS}
+    except (ValueError, TypeError):
+        # Algum valor não cabe no tipo declarado (ou alguma linha está incompleta, o que o
+        # pyarrow acusa como ParserError, subclasse de ValueError): relê como texto e valida coluna a coluna
+        if hasattr(caminho_arquivo, 'seek'):
+            caminho_arquivo.seek(0)
+        df_original = _ler_como_texto(caminho_arquivo)
+        df, falhas = _converter_numericas(df_original.copy())
+
+    for coluna in COLUNAS_OBRIGATORIAS:
+        falhas[coluna] = df[coluna].isna()
+    datas = pd.to_datetime(df[COLUNA_DATA], format=FORMATO_DATA, errors='coerce')
+    falhas[COLUNA_DATA] = datas.isna()
+
+    linhas_invalidas = pd.concat(falhas, axis=1).any(axis=1)
+    if linhas_invalidas.any():
+        df_rejeitadas = df_original[linhas_invalidas].copy()
+        df_rejeitadas['motivo'] = pd.DataFrame(
+            {coluna: mascara[linhas_invalidas] for coluna, mascara in falhas.items()}
+        ).apply(lambda linha: ', '.join(linha.index[linha]), axis=1)
+        df = df[~linhas_invalidas]
+        datas = datas[~linhas_invalidas]
+    else:
+        df_rejeitadas = df_original.iloc[0:0].assign(motivo=pd.Series(dtype='string'))
+
+    df = df.assign(**{COLUNA_DATA: datas}).astype(ESQUEMA_ESTOQUE)
+    return df.reset_index(drop=True), df_rejeitadas
+
+
+def adicionar_colunas_de_periodo(df):
+    """Acrescenta ano_compra/mes_compra (usadas pelos filtros globais) a partir da data da última compra."""
+    df['ano_compra'] = df[COLUNA_DATA].dt.year.astype('int16')
+    df['mes_compra'] = df[COLUNA_DATA].dt.month.astype('int8')
+    return df
+
+
+def ordenar_por_data(df):
+    """Ordena as linhas pela data da última compra (ordenação estável), renumerando o índice."""
+    return df.sort_values(COLUNA_DATA, kind='stable').reset_index(drop=True)
+
+
+def preparar_estoque(df):
+    """Deixa o estoque lido do CSV no formato usado pelo painel: ordenado pela data e com ano/mês."""
+    return adicionar_colunas_de_periodo(ordenar_por_data(df))
+
+
+def indexar_periodos(df):
+    """Mapeia cada (ano, mês) presente para a faixa de linhas (inicio, fim) que ele ocupa.
+
+    Exige df ordenado pela data (ver preparar_estoque): assim cada mês é um bloco contíguo
+    e filtrar por período vira um fatiamento posicional, sem máscara sobre todas as linhas.
+    """
+    if len(df) == 0:
+        return {}
+    codigos = df['ano_compra'].to_numpy(dtype='int32') * 12 + df['mes_compra'].to_numpy(dtype='int32') - 1
+    inicios = np.flatnonzero(np.r_[True, codigos[1:] != codigos[:-1]])
+    fins = np.r_[inicios[1:], len(codigos)]
+    return {
+        (int(codigo // 12), int(codigo % 12 + 1)): (int(inicio), int(fim))
+        for codigo, inicio, fim in zip(codigos[inicios], inicios, fins)
+    }
+
+
+def anos_indexados(indice_periodos):
+    """Anos presentes no índice, do mais recente para o mais antigo."""
+    return sorted({ano for ano, _ in indice_periodos}, reverse=True)
+
+
+def meses_indexados(indice_periodos, ano):
+    """Meses (1-12) presentes no índice para o ano informado, em ordem crescente."""
+    return sorted(mes for ano_indice, mes in indice_periodos if ano_indice == ano)
+
+
+def faixa_do_periodo(indice_periodos, ano=None, mes=None, total_linhas=0):
+    """Faixa de linhas (inicio, fim) do ano/mês (None significa 'Todos'); (0, 0) se não houver dados."""
+    if ano is None:
+        return 0, total_linhas
+    faixas = [faixa for (ano_indice, mes_indice), faixa in indice_periodos.items()
+              if ano_indice == ano and (mes is None or mes_indice == mes)]
+    if not faixas:
+        return 0, 0
+    return min(inicio for inicio, _ in faixas), max(fim for _, fim in faixas)
+
+
+def faixa_das_datas(df, data_inicial=None, data_final=None):
+    """Faixa de linhas (inicio, fim) com a data da última compra entre data_inicial e data_final (inclusive).
+
+    Busca binária sobre df ordenado pela data; None deixa o respectivo lado em aberto.
+    """
+    datas = df[COLUNA_DATA].to_numpy()
+    inicio = 0 if data_inicial is None else int(np.searchsorted(datas, np.datetime64(pd.Timestamp(data_inicial)), 'left'))
+    if data_final is None:
+        fim = len(datas)
+    else:
+        dia_seguinte = pd.Timestamp(data_final).normalize() + pd.Timedelta(days=1)
+        fim = int(np.searchsorted(datas, np.datetime64(dia_seguinte), 'left'))
+    return inicio, max(inicio, fim)
+
+
+def caminho_snapshot(caminho_csv):
+    """Caminho do snapshot colunar (Feather) correspondente a um CSV de estoque."""
+    return os.path.splitext(caminho_csv)[0] + '.feather'
+
+
+def _caminho_rejeitadas(caminho_snapshot_estoque):
+    return os.path.splitext(caminho_snapshot_estoque)[0] + '.rejeitadas.feather'
+
+
+# Chave, nos metadados do esquema do snapshot, da versão do CSV de origem (tamanho e mtime em ns)
+METADADO_ORIGEM = b'estoque.origem'
+
+
+def _versao_origem(caminho_csv):
+    info = os.stat(caminho_csv)
+    return f'{info.st_size}:{info.st_mtime_ns}'.encode('ascii')
+
+
+def _gravar_feather(df, caminho_destino, metadados=None):
+    # Sem compressão, para que a leitura possa mapear o arquivo em memória.
+    # Grava num temporário e renomeia, para que nenhum leitor veja um arquivo pela metade.
+    caminho_temporario = caminho_destino + '.tmp'
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    if metadados:
+        tabela = tabela.replace_schema_metadata({**tabela.schema.metadata, **metadados})
+    feather.write_feather(tabela, caminho_temporario, compression='uncompressed')
+    os.replace(caminho_temporario, caminho_destino)
+
+
+def gerar_snapshot(caminho_csv, caminho_destino=None):
+    """Converte o CSV de estoque num snapshot Feather já tipado e com ano_compra/mes_compra.
+
+    As linhas rejeitadas pelo esquema são gravadas num arquivo '.rejeitadas.feather' ao lado.
+    Retorna (caminho_destino, df, df_rejeitadas).
+    """
+    if feather is None:
+        raise ImportError('O pacote "pyarrow" é necessário para gerar o snapshot colunar.')
+
+    caminho_destino = caminho_destino or caminho_snapshot(caminho_csv)
+    # Versão lida antes do conteúdo: se o CSV mudar durante a leitura, o snapshot já nasce desatualizado
+    versao_origem = _versao_origem(caminho_csv)
+    df, df_rejeitadas = ler_csv_estoque(caminho_csv)
+    df = preparar_estoque(df)
+
+    _gravar_feather(df, caminho_destino, {METADADO_ORIGEM: versao_origem})
+    caminho_rejeitadas = _caminho_rejeitadas(caminho_destino)
+    if df_rejeitadas.empty:
+        if os.path.exists(caminho_rejeitadas):
+            os.remove(caminho_rejeitadas)
+    else:
+        _gravar_feather(df_rejeitadas.reset_index(names='linha'), caminho_rejeitadas)
+    return caminho_destino, df, df_rejeitadas
+
+
+def snapshot_atualizado(caminho_csv, caminho_snapshot_estoque=None):
+    """True se existe um snapshot gerado exatamente da versão atual do CSV (mesmo tamanho e mtime).
+
+    Comparar só as datas de modificação não basta: um CSV substituído por outro com data mais
+    antiga (cp -p, rsync -t, exportação descompactada) deixaria valer o snapshot do anterior.
+    Snapshots sem essa informação (gerados por versões anteriores) são considerados desatualizados.
+    """
+    caminho_snapshot_estoque = caminho_snapshot_estoque or caminho_snapshot(caminho_csv)
+    if feather is None or not os.path.exists(caminho_snapshot_estoque):
+        return False
+    try:
+        metadados = pa.ipc.open_file(pa.memory_map(caminho_snapshot_estoque)).schema.metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return False
+    return metadados.get(METADADO_ORIGEM) == _versao_origem(caminho_csv)
+
+
+def ler_snapshot(caminho_snapshot_estoque):
+    """Lê o snapshot Feather (mapeado em memória) e as linhas rejeitadas gravadas junto com ele."""
+    df = feather.read_table(caminho_snapshot_estoque, memory_map=True).to_pandas()
+
+    caminho_rejeitadas = _caminho_rejeitadas(caminho_snapshot_estoque)
+    if os.path.exists(caminho_rejeitadas):
+        df_rejeitadas = feather.read_table(caminho_rejeitadas, memory_map=True).to_pandas().set_index('linha')
+    else:
+        df_rejeitadas = pd.DataFrame(columns=COLUNAS_ESTOQUE + ['motivo'], dtype='string')
+    return df, df_rejeitadas
+
+
+def carregar_estoque(caminho_csv):
+    """Carrega o estoque já preparado, preferindo o snapshot colunar quando ele está atualizado.
+
+    Retorna (df, df_rejeitadas), como ler_csv_estoque.
+    """
+    if snapshot_atualizado(caminho_csv):
+        df, df_rejeitadas = ler_snapshot(caminho_snapshot(caminho_csv))
+        # Snapshots antigos podem não estar ordenados pela data
+        if not df[COLUNA_DATA].is_monotonic_increasing:
+            df = ordenar_por_data(df)
+        # Snapshots antigos podem ter o produto como texto
+        if not isinstance(df['produto'].dtype, pd.CategoricalDtype):
+            df = df.astype({'produto': 'category'})
+        return df, df_rejeitadas
+
+    df, df_rejeitadas = ler_csv_estoque(caminho_csv)
+    return preparar_estoque(df), df_rejeitadas
+
+
+def alinhar_categorias(*dfs):
+    """Faz as colunas categóricas em comum usarem as mesmas categorias, para que concat as preserve."""
+    colunas = [coluna for coluna in dfs[0].columns
+               if all(coluna in df.columns and isinstance(df[coluna].dtype, pd.CategoricalDtype) for df in dfs)]
+    alinhados = [df.copy(deep=False) for df in dfs]
+    for coluna in colunas:
+        categorias = dfs[0][coluna].cat.categories
+        for df in dfs[1:]:
+            categorias = categorias.union(df[coluna].cat.categories)
+        for df in alinhados:
+            df[coluna] = df[coluna].cat.set_categories(categorias)
+    return alinhados
+
+
+def acrescentar_linhas(df, df_novas):
+    """Junta linhas novas (já passadas por preparar_estoque) ao estoque preparado, sem alterar df.
+
+    O resultado continua ordenado pela data: se as linhas novas são todas mais recentes
+    (o caso comum numa exportação que só cresce), basta concatená-las ao final.
+    """
+    if df_novas.empty:
+        return df
+    df, df_novas = alinhar_categorias(df, df_novas)
+    combinado = pd.concat([df, df_novas], ignore_index=True)
+    if not df.empty and df_novas[COLUNA_DATA].iloc[0] < df[COLUNA_DATA].iloc[-1]:
+        combinado = ordenar_por_data(combinado)
+    return combinado
+
+
+def ler_acrescimos(caminho_csv, posicao=0, linhas_lidas=0):
+    """Lê apenas as linhas completas do CSV a partir do byte 'posicao' (0 = logo após o cabeçalho).
+
+    Uma linha final sem quebra de linha (talvez ainda sendo escrita) fica para a próxima leitura
+    (ver ler_linha_final).
+    'linhas_lidas' é o número de linhas de dados antes de 'posicao', usado para numerar
+    as rejeitadas como na leitura completa.
+    Retorna (df_novas, df_rejeitadas, nova_posicao, linhas_na_leitura).
+    """
+    with open(caminho_csv, 'rb') as arquivo:
+        cabecalho = arquivo.readline()
+        arquivo.seek(max(posicao, len(cabecalho)))
+        conteudo = arquivo.read()
+
+    posicao = max(posicao, len(cabecalho))
+    fim = conteudo.rfind(b'\n') + 1
+    if fim == 0:
+        df_vazio, df_rejeitadas = ler_csv_estoque(io.BytesIO(cabecalho))
+        return df_vazio, df_rejeitadas, posicao, 0
+
+    df_novas, df_rejeitadas = ler_csv_estoque(io.BytesIO(cabecalho + conteudo[:fim]))
+    df_rejeitadas.index += linhas_lidas
+    return df_novas, df_rejeitadas, posicao + fim, len(df_novas) + len(df_rejeitadas)
+
+
+def ler_linha_final(caminho_csv, posicao, linhas_lidas=0):
+    """Lê a linha final sem quebra de linha que ler_acrescimos deixou depois de 'posicao' (se houver).
+
+    Uma leitura completa do arquivo inclui essa linha; a ingestão incremental a inclui sem
+    avançar a posição, para relê-la na próxima atualização caso ela ainda cresça.
+    Retorna (df_final, df_rejeitadas), vazios se o arquivo termina com quebra de linha.
+    """
+    with open(caminho_csv, 'rb') as arquivo:
+        cabecalho = arquivo.readline()
+        arquivo.seek(max(posicao, len(cabecalho)))
+        conteudo = arquivo.read()
+    if not conteudo.strip():
+        conteudo = b''
+    df_final, df_rejeitadas = ler_csv_estoque(io.BytesIO(cabecalho + conteudo + (b'\n' if conteudo else b'')))
+    df_rejeitadas.index += linhas_lidas
+    return df_final, df_rejeitadas
+
+
+# Tamanho de cada parte lida por ler_csv_em_partes
+BYTES_POR_PARTE = 64 * 1024 * 1024
+
+
+def ler_csv_em_partes(caminho_csv, bytes_por_parte=BYTES_POR_PARTE):
+    """Lê o CSV em partes de cerca de bytes_por_parte bytes, sempre em linhas completas.
+
+    Gera (df_parte, df_rejeitadas) para cada parte, como ler_csv_estoque, sem nunca ter o
+    arquivo inteiro em memória. As rejeitadas são numeradas como na leitura completa.
+    """
+    linhas_lidas = 0
+    with open(caminho_csv, 'rb') as arquivo:
+        cabecalho = arquivo.readline()
+        resto = b''
+        while True:
+            bloco = arquivo.read(bytes_por_parte)
+            conteudo = resto + bloco
+            # Sem mais blocos, a última linha pode não terminar com quebra de linha
+            fim = len(conteudo) if not bloco else conteudo.rfind(b'\n') + 1
+            resto = conteudo[fim:]
+            if conteudo[:fim].strip():
+                df_parte, df_rejeitadas = ler_csv_estoque(io.BytesIO(cabecalho + conteudo[:fim]))
+                df_rejeitadas.index += linhas_lidas
+                linhas_lidas += len(df_parte) + len(df_rejeitadas)
+                yield df_parte, df_rejeitadas
+            if not bloco:
+                break
+
+
+class IngestaoIncremental:
+    """Acompanha um CSV de estoque que só recebe linhas novas no final (exportação do ERP ao longo do dia).
+
+    Cada chamada a atualizar() lê apenas os bytes acrescentados desde a anterior e os junta ao
+    DataFrame já carregado (e ao agregado opcional). Uma linha final sem quebra de linha entra
+    no resultado, como numa leitura completa, mas é relida a cada atualização até ser terminada;
+    se ela ainda não passa no esquema (escrita pela metade), fica de fora até lá. Se o arquivo
+    encolheu, ou se o cabeçalho ou os últimos bytes já lidos mudaram, ele foi reescrito: a leitura
+    recomeça do zero. Edições no meio do arquivo que preservem esses trechos não são detectadas;
+    use "Recarregar dados" nesse caso.
+    """
+
+    # Bytes finais do trecho já lido, comparados a cada atualização para detectar reescritas
+    TAMANHO_ASSINATURA = 256
+
+    def __init__(self, caminho_csv, construir_agregado=None, acrescentar_agregado=None):
+        self.caminho_csv = caminho_csv
+        self._construir_agregado = construir_agregado
+        self._acrescentar_agregado = acrescentar_agregado
+        self._trava = threading.Lock()
+        self._recomecar()
+
+    def _recomecar(self):
+        self.df = None
+        self.df_rejeitadas = None
+        self.agregado = None
+        self._posicao = 0
+        self._linhas_lidas = 0
+        self._assinatura = b''
+
+    def _ler_assinatura(self, arquivo, posicao):
+        arquivo.seek(0)
+        cabecalho = arquivo.readline()
+        inicio = max(len(cabecalho), posicao - self.TAMANHO_ASSINATURA)
+        arquivo.seek(inicio)
+        return cabecalho + arquivo.read(posicao - inicio)
+
+    def _so_cresceu(self):
+        """True se o arquivo ainda começa exatamente com o que já foi lido."""
+        if self.df is None or os.path.getsize(self.caminho_csv) < self._posicao:
+            return False
+        with open(self.caminho_csv, 'rb') as arquivo:
+            return self._ler_assinatura(arquivo, self._posicao) == self._assinatura
+
+    def atualizar(self):
+        """Incorpora o que foi acrescentado ao arquivo e devolve (df, df_rejeitadas, agregado).
+
+        Nunca altera os DataFrames devolvidos anteriormente: cada atualização cria objetos novos,
+        de modo que quem ainda estiver usando a versão anterior não é afetado.
+        """
+        with self._trava:
+            if not self._so_cresceu():
+                self._recomecar()
+
+            df_novas, df_rejeitadas, posicao, linhas = ler_acrescimos(self.caminho_csv, self._posicao, self._linhas_lidas)
+            df_novas = preparar_estoque(df_novas)
+            if self.df is None:
+                self.df = df_novas
+                self.df_rejeitadas = df_rejeitadas
+                if self._construir_agregado is not None:
+                    self.agregado = self._construir_agregado(self.df)
+            elif linhas:
+                self.df = acrescentar_linhas(self.df, df_novas)
+                if not df_rejeitadas.empty:
+                    self.df_rejeitadas = pd.concat([self.df_rejeitadas, df_rejeitadas])
+                if self._acrescentar_agregado is not None:
+                    self.agregado = self._acrescentar_agregado(self.agregado, df_novas)
+
+            self._posicao = posicao
+            self._linhas_lidas += linhas
+            with open(self.caminho_csv, 'rb') as arquivo:
+                self._assinatura = self._ler_assinatura(arquivo, posicao)
+            return self._com_linha_final()
+
+    def _com_linha_final(self):
+        # A linha final não terminada é somada só ao resultado devolvido, não ao estado guardado.
+        # Se ela não passa no esquema, o ERP provavelmente ainda a está escrevendo: fica pendente
+        # (nem aceita nem rejeitada) até ganhar a quebra de linha e ser lida por ler_acrescimos.
+        try:
+            df_final, df_rejeitadas = ler_linha_final(self.caminho_csv, self._posicao, self._linhas_lidas)
+        except (ValueError, TypeError):
+            return self.df, self.df_rejeitadas, self.agregado
+        if df_final.empty or not df_rejeitadas.empty:
+            return self.df, self.df_rejeitadas, self.agregado
+        df_final = preparar_estoque(df_final)
+        agregado = self.agregado
+        if self._acrescentar_agregado is not None:
+            agregado = self._acrescentar_agregado(self.agregado, df_final)
+        return acrescentar_linhas(self.df, df_final), self.df_rejeitadas, agregado
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Gera o snapshot colunar (Feather) do CSV de estoque.')
+    parser.add_argument('caminho_csv', nargs='?', default='df_estoque.csv')
+    parser.add_argument('-o', '--saida', help='caminho do snapshot (padrão: mesmo nome do CSV, extensão .feather)')
+    args = parser.parse_args()
+
+    destino, df, df_rejeitadas = gerar_snapshot(args.caminho_csv, args.saida)
+    print(f'{len(df)} linha(s) gravadas em {destino}.')
+    if not df_rejeitadas.empty:
+        print(f'{len(df_rejeitadas)} linha(s) rejeitadas pelo esquema:')
+        print(df_rejeitadas.to_string())
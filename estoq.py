@@ -1,279 +1,679 @@
-import streamlit as st
-import pandas as pd
-import plotly.express as px
-import datetime
-import time
-import os
-import plotly.graph_objects as go
-
-st.set_page_config(page_title="Go MED SAÚDE - Análise de Estoque", page_icon=":bar_chart:", layout="wide")
-
-CAMINHO_ARQUIVO_ESTOQUE = 'df_estoque.csv'
-
-MESES_ABREVIADOS = {
-    1: 'Jan', 2: 'Fev', 3: 'Mar', 4: 'Abr', 5: 'Mai', 6: 'Jun',
-    7: 'Jul', 8: 'Ago', 9: 'Set', 10: 'Out', 11: 'Nov', 12: 'Dez'
-}
-
-def carregar_dados(caminho_arquivo):
-    try:
-        df = pd.read_csv(caminho_arquivo)
-
-        df['data ultima compra'] = pd.to_datetime(df['data ultima compra'], errors='coerce')
-
-        df.dropna(subset=['data ultima compra'], inplace=True)
-
-        if df.empty:
-            st.warning('O arquivo está vazio ou não contém dados válidos após o pré-processamento.')
-            return None
-        return df
-    except FileNotFoundError:
-        st.error('Arquivo não encontrado! Certifique-se de que "df_estoque.csv" está no mesmo diretório.')
-        return None
-    except Exception as e:
-        st.error(f'Ocorreu um erro ao carregar ou processar o arquivo: {e}')
-        return None
-
-def formatar_moeda(valor, simbolo_moeda='R$'):
-    if pd.isna(valor):
-        return ''
-    try:
-        return f'{simbolo_moeda} {valor:,.2f}'.replace(',', 'x').replace('.', ',').replace('x', '.')
-    except (TypeError, ValueError):
-        return 'Valor inválido'
-
-# --- Título da Aplicação ---
-st.title('📊 Análise de Estoque')
-
-# --- Carregar Dados ---
-df_estoque = carregar_dados(CAMINHO_ARQUIVO_ESTOQUE)
-
-if df_estoque is None:
-    st.info("Carregue um arquivo 'df_estoque.csv' para visualizar as análises.")
-    st.stop()
-
-# --- Filtros Globais (agora no corpo principal, no topo) ---
-st.header("Filtros Globais")
-
-# Certifique-se de que a coluna 'data ultima compra' está em formato datetime
-# Isso já é feito na função carregar_dados, mas é bom garantir antes de extrair o ano/mês
-df_estoque['data ultima compra'] = pd.to_datetime(df_estoque['data ultima compra'], errors='coerce')
-df_estoque.dropna(subset=['data ultima compra'], inplace=True) # Remover linhas com datas inválidas
-
-# Extrair Ano e Mês para os filtros
-df_estoque['ano_compra'] = df_estoque['data ultima compra'].dt.year
-df_estoque['mes_compra'] = df_estoque['data ultima compra'].dt.month
-
-col_filtros_1, col_filtros_2 = st.columns(2)
-
-with col_filtros_1:
-    # Seletor de Ano
-    todos_anos = ['Todos'] + sorted(df_estoque['ano_compra'].unique().tolist(), reverse=True)
-    ano_filtro = st.selectbox("Filtrar por Ano da Última Compra:", todos_anos)
-
-with col_filtros_2:
-    # Seletor de Mês (dependente do ano selecionado)
-    meses_disponiveis = []
-    if ano_filtro != 'Todos':
-        meses_disponiveis_no_ano = df_estoque[df_estoque['ano_compra'] == ano_filtro]['mes_compra'].unique().tolist()
-        # Mapeia os números dos meses para as abreviações, ordenando pelos números
-        meses_disponiveis = sorted([MESES_ABREVIADOS[m] for m in meses_disponiveis_no_ano], 
-                                    key=lambda x: list(MESES_ABREVIADOS.values()).index(x))
-    
-    todos_meses = ['Todos'] + meses_disponiveis
-    mes_filtro = st.selectbox("Filtrar por Mês da Última Compra:", todos_meses)
-
-# Aplicar filtros
-df_filtrado = df_estoque.copy()
-
-if ano_filtro != 'Todos':
-    df_filtrado = df_filtrado[df_filtrado['ano_compra'] == ano_filtro]
-
-if mes_filtro != 'Todos':
-    # Converter o mês abreviado de volta para número para filtrar
-    num_mes_selecionado = None
-    for num, abbrev in MESES_ABREVIADOS.items():
-        if abbrev == mes_filtro:
-            num_mes_selecionado = num
-            break
-    if num_mes_selecionado is not None:
-        df_filtrado = df_filtrado[df_filtrado['mes_compra'] == num_mes_selecionado]
-
-
-st.markdown("---") 
-
-
-## Visão Geral do Estoque
-st.header("Visão Geral do Estoque")
-col1, col2, col3 = st.columns(3)
-
-total_produtos = df_filtrado['produto'].nunique()
-total_itens_fisicos = df_filtrado['quantidade fisica'].sum()
-valor_total_estoque = (df_filtrado['quantidade fisica'] * df_filtrado['custo liquido entrada']).sum()
-
-col1.metric("Total de Produtos Únicos", total_produtos)
-col2.metric("Total de Itens Físicos", f"{total_itens_fisicos:,.0f}".replace(",", "X").replace(".", ",").replace("X", "."))
-col3.metric("Valor Total do Estoque", formatar_moeda(valor_total_estoque))
-
-
-if not df_filtrado.empty:
-    df_agrupado_fabricante = df_filtrado.groupby('fabricante')['quantidade fisica'].sum().reset_index()
-    
-    # Ordena os fabricantes pela quantidade física em ordem decrescente e pega os 10 maiores
-    df_top_10_fabricantes = df_agrupado_fabricante.sort_values(by='quantidade fisica', ascending=False).head(10)
-    
-    fig = px.bar(df_top_10_fabricantes, x='fabricante', y='quantidade fisica',
-                 title='Top 10 Fabricantes por Quantidade Física', # Mudei o título do gráfico
-                 labels={'quantidade fisica': 'Quantidade Física Total', 'fabricante': 'Fabricante'})
-    st.plotly_chart(fig, use_container_width=True)
-else:
-    st.info("Nenhum dado para exibir com os filtros selecionados.")
-
-st.markdown("---")
-
-
-## 1. Disponibilidade Real vs. Demanda
-st.header("1. Disponibilidade Real vs. Solicitada/Reservada")
-st.markdown("Compare o que você tem em estoque com o que está sendo solicitado e reservado para entender sua capacidade de atender à demanda.")
-
-if not df_filtrado.empty:
-    
-    df_resumo_quantidades = df_filtrado.groupby('produto').agg(
-        quantidade_fisica=('quantidade fisica', 'sum'),
-        quantidade_solicitada=('quantidade solicitada', 'sum'),
-        quantidade_reservada=('quantidade reservada', 'sum'),
-        quantidade_disponivel=('quantidade disponivel', 'sum')
-    ).reset_index()
-
-    if not df_resumo_quantidades.empty:
-        st.dataframe(df_resumo_quantidades)
-    else:
-        st.info("Nenhum dado para exibir com os filtros selecionados para o comparativo de quantidades.")
-
-    st.subheader("Produtos com Baixa Disponibilidade")
-    # Troca st.slider por st.number_input para permitir digitação
-    limite_disponibilidade = st.number_input(
-        "Mostrar produtos com 'quantidade disponivel' abaixo de:",
-        min_value=0, # Valor mínimo que pode ser digitado
-        # max_value pode ser um valor alto fixo ou baseado nos seus dados.
-        # Se df_filtrado estiver vazio, int() dará erro se não houver um fallback.
-        max_value=int(df_filtrado['quantidade disponivel'].max() if not df_filtrado.empty and 'quantidade disponivel' in df_filtrado.columns else 1000), 
-        value=10, # Valor inicial
-        step=1, # Passo de incremento/decremento
-        key="disp_input_filter" # Chave única para o widget
-    )
-
-    produtos_baixa_disponibilidade = df_filtrado[
-        (df_filtrado['quantidade disponivel'] < limite_disponibilidade) &
-        (df_filtrado['quantidade disponivel'] >= 0) # Adicionado para garantir que só pega valores não negativos, se aplicável
-    ].sort_values(by='quantidade solicitada', ascending=False)
-
-    if not produtos_baixa_disponibilidade.empty:
-        st.dataframe(produtos_baixa_disponibilidade[['produto', 'fabricante', 'quantidade fisica', 'quantidade solicitada', 'quantidade reservada', 'quantidade disponivel']])
-    else:
-        st.info("Nenhum produto com disponibilidade abaixo do limite selecionado.")
-else:
-    st.info("Nenhum dado para exibir com os filtros selecionados.")
-
-st.markdown("---")
-
-
-## 2. Análise de Avarias
-st.header("2. Análise de Avarias")
-
-if not df_filtrado.empty:
-    df_avariado = df_filtrado[df_filtrado['quantidade avariada'] > 0].copy()
-
-    if not df_avariado.empty:
-        df_avariado['porcentagem_avaria'] = (df_avariado['quantidade avariada'] / df_avariado['quantidade fisica']) * 100
-        df_avariado.fillna(0, inplace=True)
-
-        st.dataframe(df_avariado[['produto', 'fabricante', 'quantidade fisica', 'quantidade avariada', 'porcentagem_avaria']].sort_values(by='quantidade avariada', ascending=False))
-    else:
-        st.info("Nenhum item avariado encontrado com os filtros selecionados.")
-else:
-    st.info("Nenhum dado para exibir com os filtros selecionados.")
-
-st.markdown("---")
-
-
-## 3. Análise de Estoque Parado/Baixo Giro
-st.header("3. Análise de Estoque Parado/Baixo Giro")
-
-if not df_filtrado.empty:
-    hoje = pd.to_datetime(datetime.date.today())
-    df_filtrado['dias_desde_ultima_compra'] = (hoje - df_filtrado['data ultima compra']).dt.days
-
-    st.subheader("Estoque com Última Compra Antiga e Quantidade Física Alta")
-    limite_dias_compra = st.slider("Considerar estoque parado se a última compra foi há mais de (dias):",
-                                     min_value=30, max_value=730, value=180, key="dias_compra_slider") 
-    
-    estoque_parado = df_filtrado[
-        (df_filtrado['dias_desde_ultima_compra'] > limite_dias_compra) &
-        (df_filtrado['quantidade fisica'] > 0)
-    ].sort_values(by='dias_desde_ultima_compra', ascending=False)
-
-    if not estoque_parado.empty:
-        st.dataframe(estoque_parado[['produto', 'fabricante', 'quantidade fisica', 'data ultima compra', 'dias_desde_ultima_compra']])
-        
-    else:
-        st.info("Nenhum estoque parado encontrado com os critérios selecionados.")
-else:
-    st.info("Nenhum dado para exibir com os filtros selecionados.")
-
-st.markdown("---")
-
-
-## 4. Identificação de Produtos Críticos
-st.header("4. Identificação de Produtos Críticos")
-st.markdown("Destaque produtos que exigem atenção imediata devido à alta demanda e baixa disponibilidade.")
-
-if not df_filtrado.empty:
-    min_disponivel = st.slider("Limite máximo para 'quantidade disponivel' para ser considerado crítico:",
-                                 min_value=0, max_value=int(df_filtrado['quantidade disponivel'].max() if not df_filtrado.empty else 50),
-                                 value=5, key="critico_slider") # Adicionado key
-    
-    produtos_criticos = df_filtrado[
-        (df_filtrado['quantidade disponivel'] < min_disponivel) &
-        (df_filtrado['quantidade solicitada'] > 0)
-    ].sort_values(by='quantidade solicitada', ascending=False)
-
-    if not produtos_criticos.empty:
-        st.subheader("Produtos Críticos (Baixa Disponibilidade e Alta Demanda)")
-        st.dataframe(produtos_criticos[['produto', 'fabricante', 'quantidade fisica', 'quantidade solicitada', 'quantidade disponivel']])
-
-        fig_criticos = px.bar(
-            produtos_criticos,
-            x='produto',
-            y=['quantidade disponivel', 'quantidade solicitada'],
-            barmode='group',
-            title='Produtos Críticos: Disponibilidade vs. Solicitação',
-            labels={'value': 'Quantidade', 'variable': 'Tipo de Estoque'}
-        )
-        st.plotly_chart(fig_criticos, use_container_width=True)
-    else:
-        st.info("Nenhum produto crítico encontrado com os critérios selecionados.")
-else:
-    st.info("Nenhum dado para exibir com os filtros selecionados.")
-
-st.markdown("---")
-
-
-## 5. Desempenho por Fabricante
-st.header("5. Desempenho por Fabricante")
-
-if not df_filtrado.empty:
-    df_desempenho_fabricante = df_filtrado.groupby('fabricante').agg(
-        total_quantidade_fisica=('quantidade fisica', 'sum'),
-        total_quantidade_avariada=('quantidade avariada', 'sum'),
-        total_quantidade_disponivel=('quantidade disponivel', 'sum'),
-        total_quantidade_solicitada=('quantidade solicitada', 'sum'),
-        contagem_produtos=('produto', 'nunique')
-    ).reset_index()
-
-    st.subheader("Métricas Agregadas por Fabricante")
-    st.dataframe(df_desempenho_fabricante.sort_values(by='total_quantidade_fisica', ascending=False))
-
-
-else:
-    st.info("Nenhum dado para exibir com os filtros selecionados.")
\ No newline at end of file
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+import datetime
+import time
+import os
+import hashlib
+import concurrent.futures
+import plotly.graph_objects as go
+
+from dados import anos_indexados, meses_indexados, IngestaoIncremental
+from agregados import construir_cubo, acrescentar_ao_cubo
+from analises import (PARAMETROS_PADRAO, montar_dados, aplicar_filtros, top_fabricantes, resumo_quantidades,
+                      baixa_disponibilidade, avarias, estoque_parado, produtos_criticos, grafico_criticos,
+                      desempenho_por_fabricante, calcular_em_paralelo, indexar_disponibilidade, indexar_idade,
+                      valor_por_faixa_de_idade)
+from carga_em_partes import montar_dados_em_partes
+from cache_disco import CacheEmDisco
+from monitor import MonitorArquivo
+from medicao import medir, iniciar_execucao, configurar_registro
+from formatacao import formatar_moeda, formatar_inteiro
+from componentes import tabela_paginada, grafico_barras_agrupadas
+
+st.set_page_config(page_title="Go MED SAÚDE - Análise de Estoque", page_icon=":bar_chart:", layout="wide")
+
+CAMINHO_ARQUIVO_ESTOQUE = 'df_estoque.csv'
+
+# Quantas versões do arquivo (caminho/tamanho/modificação) ficam em memória. Cada versão
+# é carregada uma única vez por processo e compartilhada (somente leitura) por todas as sessões;
+# 2 permite que sessões ainda renderizando a versão anterior terminem enquanto a nova é usada.
+MAX_VERSOES_EM_CACHE = 2
+# Se True, a versão do arquivo é identificada também pelo hash do conteúdo
+# (um "touch" sem alterar o conteúdo não invalida o cache, mas cada execução lê o arquivo inteiro)
+USAR_HASH_CONTEUDO = False
+# Se True, quando o arquivo só recebeu linhas novas no final (exportação do ERP ao longo do dia),
+# apenas essas linhas são lidas e somadas aos dados e ao cubo já carregados
+INGESTAO_INCREMENTAL = False
+# Se True, o arquivo é lido em partes e só ficam em memória o cubo de agregados e as primeiras
+# linhas de cada seção (ver carga_em_partes.py): para exportações maiores que a memória.
+# Nesse modo as tabelas de linhas mostram só as primeiras linhas, não há filtro por intervalo
+# de datas e INGESTAO_INCREMENTAL é ignorado.
+CARGA_EM_PARTES = False
+# Se True, o arquivo é observado e recarregado em segundo plano quando muda; as páginas abertas
+# são atualizadas sozinhas. A recarga espera ESPERA_RECARGA_SEGUNDOS sem novas escritas.
+AUTO_ATUALIZAR = False
+ESPERA_RECARGA_SEGUNDOS = 2
+INTERVALO_VERIFICACAO_PAGINA_SEGUNDOS = 5
+# Se True, mostra na barra lateral o tempo de cada etapa da última execução completa da página
+PAINEL_DESEMPENHO = False
+# Se True, cada etapa medida também vai para o log (stderr) como uma linha JSON
+REGISTRAR_DESEMPENHO = False
+
+# Se True, os resultados de todas as seções são calculados ao mesmo tempo, em threads, antes de
+# desenhar a aba aberta (ver analises.calcular_em_paralelo)
+CALCULO_PARALELO = False
+THREADS_CALCULO_PARALELO = min(5, os.cpu_count() or 1)
+
+# Quantos resultados (combinações de filtros e parâmetros) cada seção guarda em memória
+MAX_RESULTADOS_POR_SECAO = 32
+# Quantos índices de cada tipo (disponibilidade e idade, um por faixa filtrada) ficam em memória
+MAX_INDICES_POR_TIPO = 4
+# Se True, os indicadores e os resultados das seções também são gravados em disco (ver
+# cache_disco.py) e continuam valendo depois de reiniciar o servidor. Com a versão do arquivo
+# por data de modificação, uma cópia nova do mesmo arquivo não aproveita o cache: para isso,
+# use USAR_HASH_CONTEUDO. Aumente VERSAO_RESULTADOS_EM_DISCO quando o cálculo de uma seção mudar.
+CACHE_EM_DISCO = False
+DIRETORIO_CACHE_EM_DISCO = '.cache_estoque'
+LIMITE_CACHE_EM_DISCO_BYTES = 256 * 1024 * 1024
+VERSAO_RESULTADOS_EM_DISCO = 1
+
+MESES_ABREVIADOS = {
+    1: 'Jan', 2: 'Fev', 3: 'Mar', 4: 'Abr', 5: 'Mai', 6: 'Jun',
+    7: 'Jul', 8: 'Ago', 9: 'Set', 10: 'Out', 11: 'Nov', 12: 'Dez'
+}
+
+def impressao_digital_arquivo(caminho_arquivo, usar_hash_conteudo=False):
+    """Identifica a versão atual do arquivo: caminho absoluto, tamanho e data de modificação (ou hash do conteúdo)."""
+    info = os.stat(caminho_arquivo)
+    if not usar_hash_conteudo:
+        return (os.path.abspath(caminho_arquivo), info.st_size, info.st_mtime_ns)
+
+    hash_conteudo = hashlib.sha256()
+    with open(caminho_arquivo, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(1024 * 1024), b''):
+            hash_conteudo.update(bloco)
+    return (os.path.abspath(caminho_arquivo), info.st_size, hash_conteudo.hexdigest())
+
+# Os dados carregados e as estruturas derivadas deles ficam em st.cache_resource: todas as
+# sessões recebem o mesmo objeto (sem cópia por sessão). Por isso eles são SOMENTE LEITURA:
+# o script nunca altera df_estoque nem df_filtrado, apenas cria resultados novos e pequenos.
+# Uma versão despejada do cache é liberada assim que a última execução que a usa termina.
+@st.cache_resource(show_spinner=False)
+def _ingestao_incremental(caminho_arquivo):
+    # Uma por arquivo e por processo: guarda até onde o arquivo já foi lido
+    return IngestaoIncremental(caminho_arquivo, construir_cubo, acrescentar_ao_cubo)
+
+def _montar_versao(caminho_arquivo, ingestao=None):
+    if CARGA_EM_PARTES:
+        return montar_dados_em_partes(caminho_arquivo)
+    return montar_dados(caminho_arquivo, ingestao)
+
+@st.cache_resource(max_entries=MAX_VERSOES_EM_CACHE, show_spinner="Carregando dados do estoque...")
+def _ler_estoque(caminho_arquivo, impressao_digital):
+    # 'impressao_digital' não é usada no corpo: ela só compõe a chave do cache,
+    # de modo que qualquer alteração no arquivo gera uma nova leitura.
+    return _montar_versao(caminho_arquivo, _ingestao_incremental(caminho_arquivo) if INGESTAO_INCREMENTAL else None)
+
+@st.cache_resource
+def _monitores_ativos():
+    # {caminho: monitor} dos monitores já criados, para pará-los sem criar um só para isso
+    return {}
+
+@st.cache_resource(show_spinner="Carregando dados do estoque...")
+def _monitor_estoque(caminho_arquivo):
+    # Um por arquivo e por processo; a primeira carga acontece aqui, as demais em segundo plano
+    ingestao = _ingestao_incremental(caminho_arquivo) if INGESTAO_INCREMENTAL else None
+
+    def carregar():
+        impressao_digital = impressao_digital_arquivo(caminho_arquivo, USAR_HASH_CONTEUDO)
+        # _montar_versao não chama nenhuma função st.*, então pode rodar na thread do monitor
+        return impressao_digital, _montar_versao(caminho_arquivo, ingestao)
+
+    monitor = MonitorArquivo(caminho_arquivo, carregar, espera=ESPERA_RECARGA_SEGUNDOS).iniciar()
+    _monitores_ativos()[caminho_arquivo] = monitor
+    return monitor
+
+@st.cache_resource
+def _cache_em_disco():
+    # Um por processo; o diretório é compartilhado com os outros processos e reinícios
+    return CacheEmDisco(DIRETORIO_CACHE_EM_DISCO, LIMITE_CACHE_EM_DISCO_BYTES)
+
+cache_em_disco = _cache_em_disco() if CACHE_EM_DISCO else None
+
+
+def memorizar_em_disco(chave, calcular):
+    """Resultado de calcular() guardado em disco sob a chave (ou só calculado, sem CACHE_EM_DISCO)."""
+    if cache_em_disco is None:
+        return calcular()
+    # O modo de carga muda o que df_estoque contém, e a versão separa resultados de cálculos antigos
+    return cache_em_disco.obter((VERSAO_RESULTADOS_EM_DISCO, CARGA_EM_PARTES) + chave, calcular)
+
+
+def invalidar_cache_dados(caminho_arquivo):
+    """Descarta todas as versões do arquivo guardadas em cache, forçando uma nova leitura."""
+    if AUTO_ATUALIZAR:
+        monitor = _monitores_ativos().pop(caminho_arquivo, None)
+        if monitor is not None:
+            monitor.parar()
+        _monitor_estoque.clear()
+    _ler_estoque.clear()
+    _ingestao_incremental.clear()
+
+def carregar_dados(caminho_arquivo):
+    try:
+        if AUTO_ATUALIZAR:
+            # Última versão já carregada pelo monitor: a leitura nunca espera por uma recarga
+            impressao_digital, dados = _monitor_estoque(caminho_arquivo).atual
+        else:
+            impressao_digital = impressao_digital_arquivo(caminho_arquivo, USAR_HASH_CONTEUDO)
+            dados = _ler_estoque(caminho_arquivo, impressao_digital)
+
+        df_rejeitadas = dados['rejeitadas']
+        if not df_rejeitadas.empty:
+            st.warning(f'{len(df_rejeitadas)} linha(s) do arquivo não respeitam o formato esperado e foram desconsideradas.')
+            with st.expander("Ver linhas desconsideradas"):
+                tabela_paginada(df_rejeitadas, chave="tabela_rejeitadas")
+
+        if dados['df'].empty:
+            st.warning('O arquivo está vazio ou não contém dados válidos após o pré-processamento.')
+            return None, None
+        # A impressão digital também serve de versão dos dados para os caches derivados
+        return dados, impressao_digital
+    except FileNotFoundError:
+        st.error('Arquivo não encontrado! Certifique-se de que "df_estoque.csv" está no mesmo diretório.')
+        return None, None
+    except Exception as e:
+        st.error(f'Ocorreu um erro ao carregar ou processar o arquivo: {e}')
+        return None, None
+
+# --- Medição de desempenho ---
+# Cada execução completa começa uma lista nova; as reexecuções parciais das seções
+# (fragmentos) continuam na lista da última execução completa.
+medicoes_execucao = iniciar_execucao()
+inicio_execucao = time.perf_counter()
+if REGISTRAR_DESEMPENHO:
+    configurar_registro()
+
+# --- Título da Aplicação ---
+st.title('📊 Análise de Estoque')
+
+# --- Carregar Dados ---
+if st.sidebar.button("🔄 Recarregar dados", help="Descarta o cache e lê novamente o arquivo de estoque."):
+    invalidar_cache_dados(CAMINHO_ARQUIVO_ESTOQUE)
+
+with medir('carregar_dados') as medicao:
+    dados_estoque, versao_dados = carregar_dados(CAMINHO_ARQUIVO_ESTOQUE)
+    medicao['linhas'] = None if dados_estoque is None else len(dados_estoque['df'])
+
+if dados_estoque is None:
+    st.info("Carregue um arquivo 'df_estoque.csv' para visualizar as análises.")
+    st.stop()
+
+# Tudo montado uma vez por versão dos dados (df_estoque vem ordenado pela data da última compra)
+df_estoque = dados_estoque['df']
+indice_periodos = dados_estoque['indice_periodos']
+# Na carga em partes, df_estoque tem só as primeiras linhas de cada seção (ver CARGA_EM_PARTES)
+em_partes = dados_estoque.get('em_partes')
+
+if AUTO_ATUALIZAR:
+    @st.fragment(run_every=INTERVALO_VERIFICACAO_PAGINA_SEGUNDOS)
+    def verificar_nova_versao():
+        # Roda sozinho a cada poucos segundos; só reexecuta a página quando o monitor trocou a versão
+        monitor = _monitor_estoque(CAMINHO_ARQUIVO_ESTOQUE)
+        if monitor.atual[0] != versao_dados:
+            st.rerun()
+        st.caption("🟢 Atualização automática ativa")
+        if monitor.ultimo_erro is not None:
+            st.caption(f"⚠️ A última recarga falhou ({monitor.ultimo_erro}); exibindo a versão anterior.")
+
+    with st.sidebar:
+        verificar_nova_versao()
+
+def _ajustar_intervalo_datas(intervalo, extensao_anterior, extensao):
+    # Pontas que estavam no limite anterior acompanham o novo limite (as linhas acrescentadas
+    # costumam ser as mais novas); as escolhidas pelo usuário só são trazidas para dentro da extensão
+    if not intervalo or extensao_anterior is None:
+        return extensao
+    return tuple(nova if ponta == anterior else min(max(ponta, extensao[0]), extensao[1])
+                 for ponta, anterior, nova in zip(intervalo, extensao_anterior, extensao))
+
+
+# --- Filtros Globais (agora no corpo principal, no topo) ---
+st.header("Filtros Globais")
+
+# A conversão de 'data ultima compra' e as colunas ano_compra/mes_compra
+# já vêm prontas (e em cache) de carregar_dados
+
+col_filtros_1, col_filtros_2, col_filtros_3 = st.columns(3)
+
+with col_filtros_1:
+    # Seletor de Ano
+    todos_anos = ['Todos'] + anos_indexados(indice_periodos)
+    ano_filtro = st.selectbox("Filtrar por Ano da Última Compra:", todos_anos)
+
+with col_filtros_2:
+    # Seletor de Mês (dependente do ano selecionado), já em ordem numérica no índice
+    meses_disponiveis = []
+    if ano_filtro != 'Todos':
+        meses_disponiveis = [MESES_ABREVIADOS[m] for m in meses_indexados(indice_periodos, ano_filtro)]
+    
+    todos_meses = ['Todos'] + meses_disponiveis
+    mes_filtro = st.selectbox("Filtrar por Mês da Última Compra:", todos_meses)
+
+with col_filtros_3:
+    # Intervalo livre de datas (a primeira e a última linha são a menor e a maior data)
+    data_minima = df_estoque['data ultima compra'].iloc[0].date()
+    data_maxima = df_estoque['data ultima compra'].iloc[-1].date()
+    if em_partes is None:
+        # O valor do widget fica na sessão; quando os dados mudam, ele é ajustado à nova extensão
+        extensao_datas = (data_minima, data_maxima)
+        if st.session_state.get('extensao_intervalo_datas') != extensao_datas:
+            st.session_state['intervalo_datas_filtro'] = _ajustar_intervalo_datas(
+                st.session_state.get('intervalo_datas_filtro'),
+                st.session_state.get('extensao_intervalo_datas'), extensao_datas)
+            st.session_state['extensao_intervalo_datas'] = extensao_datas
+        intervalo_datas = st.date_input("Filtrar por Período da Última Compra:",
+                                        min_value=data_minima, max_value=data_maxima,
+                                        format="DD/MM/YYYY", key="intervalo_datas_filtro")
+    else:
+        # Os agregados da carga em partes são mensais: só os filtros de ano e mês se aplicam
+        intervalo_datas = ()
+        st.caption(f"Carga em partes: {formatar_inteiro(em_partes['total_linhas'])} linhas lidas. "
+                   f"As tabelas de linhas mostram as {em_partes['linhas_por_lista']} primeiras.")
+
+num_mes_selecionado = None
+if mes_filtro != 'Todos':
+    # Converter o mês abreviado de volta para número para filtrar
+    for num, abbrev in MESES_ABREVIADOS.items():
+        if abbrev == mes_filtro:
+            num_mes_selecionado = num
+            break
+
+# Enquanto o usuário escolhe o intervalo, o date_input devolve só a data inicial. Uma ponta
+# igual ao limite dos dados não filtra nada: assim linhas novas nunca ficam de fora por engano.
+data_inicial = intervalo_datas[0] if len(intervalo_datas) > 0 and intervalo_datas[0] != data_minima else None
+data_final = intervalo_datas[1] if len(intervalo_datas) > 1 and intervalo_datas[1] != data_maxima else None
+
+# Aplicar filtros
+# df_filtrado é um fatiamento posicional de df_estoque (ou o próprio df_estoque, sem filtro)
+# e nunca é alterado pelas seções abaixo.
+with medir('filtros') as medicao:
+    filtrado = aplicar_filtros(dados_estoque,
+                               ano=None if ano_filtro == 'Todos' else ano_filtro,
+                               mes=num_mes_selecionado,
+                               data_inicial=data_inicial, data_final=data_final,
+                               memorizar=lambda chave, calcular: memorizar_em_disco((versao_dados,) + chave, calcular))
+    df_filtrado = filtrado['df']
+    # Indicadores e totais por fabricante saem de uma única agregação da fatia do cubo
+    # e alimentam a visão geral, o top 10 e a seção 5
+    indicadores = filtrado['indicadores']
+    df_totais_fabricante = filtrado['totais_fabricante']
+    # Fatia do cubo correspondente aos filtros (somas por produto da seção 1)
+    cubo_filtrado = filtrado['cubo']
+    medicao['linhas'] = len(df_filtrado)
+
+
+st.markdown("---") 
+
+
+## Visão Geral do Estoque
+st.header("Visão Geral do Estoque")
+col1, col2, col3 = st.columns(3)
+
+total_produtos = indicadores['total_produtos']
+total_itens_fisicos = indicadores['total_itens_fisicos']
+valor_total_estoque = indicadores['valor_total_estoque']
+
+col1.metric("Total de Produtos Únicos", total_produtos)
+col2.metric("Total de Itens Físicos", formatar_inteiro(total_itens_fisicos))
+col3.metric("Valor Total do Estoque", formatar_moeda(valor_total_estoque))
+
+
+if not df_totais_fabricante.empty:
+    # Ordena os fabricantes pela quantidade física em ordem decrescente e pega os 10 maiores
+    with medir('visao_geral.grafico_top10_fabricantes', linhas=len(df_totais_fabricante)):
+        df_top_10_fabricantes = top_fabricantes(df_totais_fabricante, 10)
+        
+        fig = px.bar(df_top_10_fabricantes, x='fabricante', y='total_quantidade_fisica',
+                     title='Top 10 Fabricantes por Quantidade Física', # Mudei o título do gráfico
+                     labels={'total_quantidade_fisica': 'Quantidade Física Total', 'fabricante': 'Fabricante'})
+    with medir('visao_geral.exibir_grafico_top10_fabricantes', linhas=len(df_top_10_fabricantes)):
+        st.plotly_chart(fig, use_container_width=True)
+else:
+    st.info("Nenhum dado para exibir com os filtros selecionados.")
+
+st.markdown("---")
+
+
+## Seções de análise
+# Cada seção fica numa aba e só é calculada e desenhada quando a aba está aberta. Os cálculos
+# são memorizados por (versão dos dados, faixa de linhas filtrada, parâmetros da seção): voltar
+# a uma aba ou mexer no controle de outra seção não refaz o cálculo.
+# A faixa (versao_dados, inicio, fim) identifica df_filtrado; o DataFrame em si (argumento com '_')
+# não entra na chave. Como os dados, os resultados são compartilhados e SOMENTE LEITURA.
+faixa_filtro = (versao_dados, filtrado['inicio'], filtrado['fim'])
+
+def _data_referencia_da_url():
+    # ?data_referencia=AAAA-MM-DD na URL fixa a data de referência (ex.: um snapshot antigo na data da exportação)
+    try:
+        return datetime.date.fromisoformat(st.query_params.get('data_referencia', ''))
+    except ValueError:
+        return None
+
+
+# A data de referência (até quando a idade do estoque é contada) entra na chave dos resultados
+# da seção 3, que assim valem o dia inteiro e podem ser reproduzidos para qualquer data.
+# Enquanto o usuário não escolhe uma (nem a URL traz uma), ela acompanha o dia atual.
+VALORES_INICIAIS_CONTROLES = {
+    'disp_input_filter': PARAMETROS_PADRAO['limite_disponibilidade'],
+    'dias_compra_slider': PARAMETROS_PADRAO['limite_dias_compra'],
+    'data_referencia': _data_referencia_da_url() or datetime.date.today(),
+    'critico_slider': PARAMETROS_PADRAO['limite_critico'],
+    'criticos_top_n': PARAMETROS_PADRAO['top_n_criticos'],
+}
+
+@st.cache_resource
+def _executor_secoes():
+    # Um por processo, compartilhado pelas sessões (ver CALCULO_PARALELO)
+    return concurrent.futures.ThreadPoolExecutor(max_workers=THREADS_CALCULO_PARALELO,
+                                                 thread_name_prefix='secoes-estoque')
+
+
+# Chaves dos controles próprios de cada seção (inclusive busca, ordenação e página das tabelas)
+CHAVES_CONTROLES_SECOES = (
+    ['disp_input_filter', 'dias_compra_slider', 'data_referencia', 'critico_slider', 'criticos_top_n']
+    + [f"{tabela}_{controle}"
+       for tabela in ('tabela_resumo_quantidades', 'tabela_baixa_disponibilidade', 'tabela_avarias',
+                      'tabela_estoque_parado', 'tabela_criticos', 'tabela_desempenho_fabricante')
+       for controle in ('busca', 'ordem', 'sentido', 'pagina')]
+)
+
+
+@st.cache_resource(max_entries=MAX_RESULTADOS_POR_SECAO, show_spinner=False)
+def _resumo_quantidades(faixa, _cubo_filtrado):
+    return memorizar_em_disco(('resumo_quantidades', faixa), lambda: resumo_quantidades(_cubo_filtrado))
+
+
+# Os controles de limite das seções 1 e 4 usam o mesmo índice da faixa: cada valor novo do
+# limite é uma busca binária, sem percorrer nem reordenar df_filtrado
+@st.cache_resource(max_entries=MAX_INDICES_POR_TIPO, show_spinner=False)
+def _indice_disponibilidade(faixa, _df_filtrado):
+    return indexar_disponibilidade(_df_filtrado)
+
+
+@st.cache_resource(max_entries=MAX_RESULTADOS_POR_SECAO, show_spinner=False)
+def _baixa_disponibilidade(faixa, limite_disponibilidade, _df_filtrado):
+    return memorizar_em_disco(('baixa_disponibilidade', faixa, limite_disponibilidade),
+                              lambda: baixa_disponibilidade(_df_filtrado, limite_disponibilidade,
+                                                            _indice_disponibilidade(faixa, _df_filtrado)))
+
+
+@st.cache_resource(max_entries=MAX_RESULTADOS_POR_SECAO, show_spinner=False)
+def _avarias(faixa, _df_filtrado):
+    return memorizar_em_disco(('avarias', faixa), lambda: avarias(_df_filtrado))
+
+
+# O índice de idade da seção 3 não depende da data de referência: só é refeito quando a faixa
+# (ou a versão dos dados) muda. Outra data de referência refaz apenas as buscas no índice.
+@st.cache_resource(max_entries=MAX_INDICES_POR_TIPO, show_spinner=False)
+def _indice_idade(faixa, _df_filtrado):
+    return indexar_idade(_df_filtrado)
+
+
+@st.cache_resource(max_entries=MAX_RESULTADOS_POR_SECAO, show_spinner=False)
+def _estoque_parado(faixa, data_referencia, limite_dias_compra, _df_filtrado):
+    return memorizar_em_disco(('estoque_parado', faixa, data_referencia, limite_dias_compra),
+                              lambda: estoque_parado(_df_filtrado, data_referencia, limite_dias_compra,
+                                                     _indice_idade(faixa, _df_filtrado)))
+
+
+@st.cache_resource(max_entries=MAX_RESULTADOS_POR_SECAO, show_spinner=False)
+def _valor_por_faixa_de_idade(faixa, data_referencia, _df_filtrado):
+    return memorizar_em_disco(('valor_por_faixa_de_idade', faixa, data_referencia),
+                              lambda: valor_por_faixa_de_idade(_df_filtrado, data_referencia,
+                                                               _indice_idade(faixa, _df_filtrado)))
+
+
+@st.cache_resource(max_entries=MAX_RESULTADOS_POR_SECAO, show_spinner=False)
+def _produtos_criticos(faixa, limite_disponivel, _df_filtrado):
+    return memorizar_em_disco(('produtos_criticos', faixa, limite_disponivel),
+                              lambda: produtos_criticos(_df_filtrado, limite_disponivel,
+                                                        _indice_disponibilidade(faixa, _df_filtrado)))
+
+
+def _limite_maximo_disponivel(df_filtrado):
+    # Na carga em partes, as listas só valem para limites até limite_disponivel_maximo
+    maximo = int(df_filtrado['quantidade disponivel'].max())
+    if em_partes is not None:
+        maximo = min(maximo, em_partes['limite_disponivel_maximo'])
+    return max(maximo, 0)
+
+
+def _primeiras_em_partes(df_resultado):
+    # Na carga em partes, só as primeiras linhas de cada resultado são exatas (ver carga_em_partes.py)
+    if em_partes is None:
+        return df_resultado
+    return df_resultado.head(em_partes['linhas_por_lista'])
+
+
+# Cada seção é um fragmento: mexer num controle da seção (limite, busca, página) reexecuta só
+# a função da seção, sem refazer filtros globais, indicadores e o gráfico de fabricantes.
+@st.fragment
+def secao_disponibilidade(df_filtrado, cubo_filtrado, faixa):
+    st.header("1. Disponibilidade Real vs. Solicitada/Reservada")
+    st.markdown("Compare o que você tem em estoque com o que está sendo solicitado e reservado para entender sua capacidade de atender à demanda.")
+
+    if df_filtrado.empty:
+        st.info("Nenhum dado para exibir com os filtros selecionados.")
+        return
+
+    with medir('secao1.resumo_quantidades', linhas=len(cubo_filtrado)):
+        df_resumo_quantidades = _resumo_quantidades(faixa, cubo_filtrado)
+    if not df_resumo_quantidades.empty:
+        tabela_paginada(df_resumo_quantidades, chave="tabela_resumo_quantidades")
+    else:
+        st.info("Nenhum dado para exibir com os filtros selecionados para o comparativo de quantidades.")
+
+    st.subheader("Produtos com Baixa Disponibilidade")
+    # Troca st.slider por st.number_input para permitir digitação
+    limite_disponibilidade = st.number_input(
+        "Mostrar produtos com 'quantidade disponivel' abaixo de:",
+        min_value=0, # Valor mínimo que pode ser digitado
+        max_value=_limite_maximo_disponivel(df_filtrado),
+        step=1, # Passo de incremento/decremento
+        key="disp_input_filter" # Chave única para o widget
+    )
+
+    with medir('secao1.baixa_disponibilidade', linhas=len(df_filtrado)):
+        produtos_baixa_disponibilidade = _primeiras_em_partes(
+            _baixa_disponibilidade(faixa, limite_disponibilidade, df_filtrado))
+    if not produtos_baixa_disponibilidade.empty:
+        tabela_paginada(produtos_baixa_disponibilidade, chave="tabela_baixa_disponibilidade")
+    else:
+        st.info("Nenhum produto com disponibilidade abaixo do limite selecionado.")
+
+
+@st.fragment
+def secao_avarias(df_filtrado, faixa):
+    st.header("2. Análise de Avarias")
+
+    if df_filtrado.empty:
+        st.info("Nenhum dado para exibir com os filtros selecionados.")
+        return
+
+    with medir('secao2.avarias', linhas=len(df_filtrado)):
+        df_avariado = _primeiras_em_partes(_avarias(faixa, df_filtrado))
+    if not df_avariado.empty:
+        tabela_paginada(df_avariado, chave="tabela_avarias")
+    else:
+        st.info("Nenhum item avariado encontrado com os filtros selecionados.")
+
+
+def _atualizar_data_referencia():
+    # Sem data fixada na URL (pelo usuário ou por um link), a referência é sempre o dia atual
+    if _data_referencia_da_url() is None:
+        st.session_state['data_referencia'] = datetime.date.today()
+
+
+def _gravar_data_referencia_na_url():
+    # A URL da página passa a reproduzir a análise na data escolhida
+    if st.session_state['data_referencia'] is not None:
+        st.query_params['data_referencia'] = st.session_state['data_referencia'].isoformat()
+
+
+@st.fragment
+def secao_estoque_parado(df_filtrado, faixa):
+    st.header("3. Análise de Estoque Parado/Baixo Giro")
+
+    if df_filtrado.empty:
+        st.info("Nenhum dado para exibir com os filtros selecionados.")
+        return
+
+    st.subheader("Estoque com Última Compra Antiga e Quantidade Física Alta")
+    col_limite, col_referencia = st.columns([3, 1])
+    with col_limite:
+        limite_dias_compra = st.slider("Considerar estoque parado se a última compra foi há mais de (dias):",
+                                       min_value=30, max_value=730, key="dias_compra_slider")
+    with col_referencia:
+        _atualizar_data_referencia()
+        data_referencia_atual = st.session_state['data_referencia']
+        data_referencia = st.date_input("Dias contados até:",
+                                        min_value=min(data_minima, data_referencia_atual),
+                                        max_value=max(datetime.date.today(), data_referencia_atual),
+                                        format="DD/MM/YYYY", key="data_referencia",
+                                        on_change=_gravar_data_referencia_na_url) or data_referencia_atual
+
+    with medir('secao3.estoque_parado', linhas=len(df_filtrado)):
+        df_estoque_parado = _primeiras_em_partes(
+            _estoque_parado(faixa, data_referencia, limite_dias_compra, df_filtrado))
+    if not df_estoque_parado.empty:
+        tabela_paginada(df_estoque_parado, chave="tabela_estoque_parado")
+    else:
+        st.info("Nenhum estoque parado encontrado com os critérios selecionados.")
+
+    # Na carga em partes só as compras mais antigas de cada mês estão em memória: sem totais por idade
+    if em_partes is not None:
+        return
+    st.subheader("Valor em Estoque por Faixa de Idade da Última Compra")
+    with medir('secao3.valor_por_faixa_de_idade', linhas=len(df_filtrado)):
+        df_valor_por_idade = _valor_por_faixa_de_idade(faixa, data_referencia, df_filtrado)
+        fig_idade = px.bar(df_valor_por_idade, x='faixa_idade', y='valor_estoque',
+                           hover_data={'quantidade_fisica': True},
+                           labels={'faixa_idade': 'Dias desde a Última Compra', 'valor_estoque': 'Valor em Estoque (R$)',
+                                   'quantidade_fisica': 'Quantidade Física'})
+    with medir('secao3.exibir_grafico_valor_por_idade', linhas=len(df_valor_por_idade)):
+        st.plotly_chart(fig_idade, use_container_width=True)
+
+
+@st.fragment
+def secao_criticos(df_filtrado, faixa):
+    st.header("4. Identificação de Produtos Críticos")
+    st.markdown("Destaque produtos que exigem atenção imediata devido à alta demanda e baixa disponibilidade.")
+
+    if df_filtrado.empty:
+        st.info("Nenhum dado para exibir com os filtros selecionados.")
+        return
+
+    min_disponivel = st.slider("Limite máximo para 'quantidade disponivel' para ser considerado crítico:",
+                                 min_value=0, max_value=_limite_maximo_disponivel(df_filtrado),
+                                 key="critico_slider") # Adicionado key
+
+    with medir('secao4.produtos_criticos', linhas=len(df_filtrado)):
+        df_criticos = _primeiras_em_partes(_produtos_criticos(faixa, min_disponivel, df_filtrado))
+    if df_criticos.empty:
+        st.info("Nenhum produto crítico encontrado com os critérios selecionados.")
+        return
+
+    st.subheader("Produtos Críticos (Baixa Disponibilidade e Alta Demanda)")
+    tabela_paginada(df_criticos, chave="tabela_criticos")
+
+    top_n_criticos = st.number_input("Produtos no gráfico (maiores quantidades solicitadas):",
+                                     min_value=1, max_value=200, step=1, key="criticos_top_n")
+    with medir('secao4.grafico_criticos', linhas=len(df_criticos)):
+        # O gráfico tem no máximo top_n_criticos + 1 barras por tipo, qualquer que seja o número de produtos críticos
+        df_grafico_criticos = grafico_criticos(df_criticos, top_n_criticos)
+
+        fig_criticos = grafico_barras_agrupadas(
+            df_grafico_criticos,
+            coluna_x='produto',
+            colunas_y=['quantidade disponivel', 'quantidade solicitada'],
+            titulo='Produtos Críticos: Disponibilidade vs. Solicitação',
+            titulo_legenda='Tipo de Estoque'
+        )
+    with medir('secao4.exibir_grafico_criticos', linhas=len(df_grafico_criticos)):
+        st.plotly_chart(fig_criticos, use_container_width=True)
+
+
+@st.fragment
+def secao_fabricantes(df_totais_fabricante):
+    st.header("5. Desempenho por Fabricante")
+
+    if df_totais_fabricante.empty:
+        st.info("Nenhum dado para exibir com os filtros selecionados.")
+        return
+
+    with medir('secao5.desempenho_fabricante', linhas=len(df_totais_fabricante)):
+        df_desempenho_fabricante = desempenho_por_fabricante(df_totais_fabricante)
+
+    st.subheader("Métricas Agregadas por Fabricante")
+    tabela_paginada(df_desempenho_fabricante, chave="tabela_desempenho_fabricante", colunas_busca=('fabricante',))
+
+
+# O Streamlit descarta o estado dos widgets que não foram desenhados na execução; como as abas
+# fechadas não desenham nada, os controles delas (limites, busca, página) são regravados aqui
+# para que o valor escolhido continue lá quando a aba for reaberta. Por isso os valores
+# iniciais ficam em VALORES_INICIAIS_CONTROLES, e não no parâmetro 'value' dos widgets.
+for chave_widget in CHAVES_CONTROLES_SECOES:
+    if chave_widget in st.session_state:
+        st.session_state[chave_widget] = st.session_state[chave_widget]
+    elif chave_widget in VALORES_INICIAIS_CONTROLES:
+        st.session_state[chave_widget] = VALORES_INICIAIS_CONTROLES[chave_widget]
+_atualizar_data_referencia()
+
+# Um limite guardado acima do max_value do widget faria o Streamlit voltar ao min_value (0) e
+# esvaziar a lista; como na página da tabela paginada, o valor é trazido para o máximo atual.
+if not df_filtrado.empty:
+    maximo_disponivel = _limite_maximo_disponivel(df_filtrado)
+    for chave_widget in ('disp_input_filter', 'critico_slider'):
+        if st.session_state[chave_widget] > maximo_disponivel:
+            st.session_state[chave_widget] = maximo_disponivel
+
+if CALCULO_PARALELO and not df_filtrado.empty:
+    # Calcula de uma vez, em threads, os resultados de todas as seções com os controles atuais.
+    # Eles ficam nos caches das seções: a aba aberta só desenha, e trocar de aba não espera
+    # por cálculo. O custo da execução fica próximo ao da seção mais lenta, não ao da soma.
+    # Valores lidos aqui: o st.session_state só pode ser consultado na thread da execução
+    limite_disponibilidade = st.session_state['disp_input_filter']
+    limite_dias_compra = st.session_state['dias_compra_slider']
+    data_referencia = st.session_state['data_referencia']
+    limite_critico = st.session_state['critico_slider']
+    with medir('secoes.calculo_paralelo', linhas=len(df_filtrado)):
+        calcular_em_paralelo({
+            'resumo_quantidades': lambda: _resumo_quantidades(faixa_filtro, cubo_filtrado),
+            'baixa_disponibilidade': lambda: _baixa_disponibilidade(faixa_filtro, limite_disponibilidade, df_filtrado),
+            'avarias': lambda: _avarias(faixa_filtro, df_filtrado),
+            'estoque_parado': lambda: _estoque_parado(faixa_filtro, data_referencia, limite_dias_compra, df_filtrado),
+            'valor_por_faixa_de_idade': lambda: _valor_por_faixa_de_idade(faixa_filtro, data_referencia, df_filtrado),
+            'produtos_criticos': lambda: _produtos_criticos(faixa_filtro, limite_critico, df_filtrado),
+        }, _executor_secoes())
+
+aba_disponibilidade, aba_avarias, aba_parado, aba_criticos, aba_fabricantes = st.tabs(
+    ["1. Disponibilidade", "2. Avarias", "3. Estoque Parado", "4. Produtos Críticos", "5. Fabricantes"],
+    key="secao_aberta", on_change="rerun")
+
+# Só a aba aberta é executada; as demais ficam vazias até serem escolhidas
+with aba_disponibilidade:
+    if aba_disponibilidade.open:
+        secao_disponibilidade(df_filtrado, cubo_filtrado, faixa_filtro)
+with aba_avarias:
+    if aba_avarias.open:
+        secao_avarias(df_filtrado, faixa_filtro)
+with aba_parado:
+    if aba_parado.open:
+        secao_estoque_parado(df_filtrado, faixa_filtro)
+with aba_criticos:
+    if aba_criticos.open:
+        secao_criticos(df_filtrado, faixa_filtro)
+with aba_fabricantes:
+    if aba_fabricantes.open:
+        secao_fabricantes(df_totais_fabricante)
+
+
+## Painel de desempenho
+if PAINEL_DESEMPENHO:
+    with st.sidebar.expander("⏱️ Desempenho da última execução", expanded=True):
+        st.caption(f"Execução completa: {formatar_inteiro((time.perf_counter() - inicio_execucao) * 1000)} ms. "
+                   "Mudanças nos controles de uma seção reexecutam só a seção e aparecem no log.")
+        st.dataframe(pd.DataFrame(medicoes_execucao, columns=['etapa', 'ms', 'linhas']).sort_values('ms', ascending=False),
+                     hide_index=True)
@@ -0,0 +1,122 @@
+"""Formatação de números no padrão brasileiro (1.234.567,89), para valores isolados ou colunas inteiras.
+
+As versões *_serie operam sobre a coluna toda com operações vetorizadas do pandas/numpy,
+sem formatar valor a valor em Python. O painel não as usa: as tabelas vão para o st.dataframe
+como números, para que a ordenação e o alinhamento no navegador continuem numéricos, e só os
+indicadores isolados viram texto. Elas servem a relatórios em texto e ao benchmark.
+"""
+import numpy as np
+import pandas as pd
+
+
+def formatar_moeda(valor, simbolo_moeda='R$'):
+    if pd.isna(valor):
+        return ''
+    try:
+        return f'{simbolo_moeda} {valor:,.2f}'.replace(',', 'x').replace('.', ',').replace('x', '.')
+    except (TypeError, ValueError):
+        return 'Valor inválido'
+
+
+def formatar_inteiro(valor):
+    """Número arredondado para inteiro, com '.' como separador de milhar."""
+    if pd.isna(valor):
+        return ''
+    return f'{valor:,.0f}'.replace(',', '.')
+
+
+# Textos de cada grupo de três dígitos, indexados pelo valor do grupo: sem zeros à esquerda
+# (grupo mais alto), com '.' e zeros à esquerda (demais grupos) e vazio (grupo inexistente).
+# Montar o número vira indexação em tabela, sem formatar valor a valor.
+_TEXTOS_GRUPO = np.array([str(i) for i in range(1000)] + [f'.{i:03d}' for i in range(1000)] + [''])
+_GRUPO_VAZIO = 2000
+_TEXTOS_CENTAVOS = np.array([f',{i:02d}' for i in range(100)])
+
+
+def _com_separador_de_milhar(inteiros):
+    """Converte um array de inteiros não negativos em texto, com '.' a cada três dígitos.
+
+    Monta o texto do grupo de milhar mais alto para o mais baixo, um grupo por passo: o
+    número de passos depende só da quantidade de dígitos do maior valor, não do tamanho
+    do array, e cada passo é uma operação vetorizada do numpy.
+    """
+    inteiros = np.asarray(inteiros, dtype='int64')
+    total_grupos = np.ones(inteiros.shape, dtype='int64')
+    potencia = 1000
+    while potencia <= inteiros.max(initial=0):
+        total_grupos += inteiros >= potencia
+        potencia *= 1000
+
+    texto = np.full(inteiros.shape, '', dtype='U1')
+    for grupo in range(int(total_grupos.max(initial=1)) - 1, -1, -1):
+        valor_grupo = (inteiros // 1000 ** grupo) % 1000
+        codigo = np.where(total_grupos == grupo + 1, valor_grupo,
+                          np.where(total_grupos > grupo + 1, valor_grupo + 1000, _GRUPO_VAZIO))
+        texto = np.char.add(texto, _TEXTOS_GRUPO[codigo])
+    return texto
+
+
+def _centavos(numeros):
+    """|numeros| em centavos, arredondados como f'{valor:.2f}' (pelo valor binário exato, empate para o par).
+
+    numeros * 100 em ponto flutuante pode cair exatamente em ,5 quando o valor real está logo
+    abaixo ou acima (ex.: 984.275 é 984.27499999...); o erro exato do produto (TwoProduct, com
+    a divisão de Veltkamp) decide esses casos.
+    """
+    numeros = np.abs(numeros)
+    produto = numeros * 100
+    divisor = numeros * 134217729.0
+    alto = divisor - (divisor - numeros)
+    baixo = numeros - alto
+    erro = (alto * 100 - produto) + baixo * 100
+
+    centavos = np.rint(produto)
+    empate = np.abs(produto - np.floor(produto) - 0.5) == 0
+    centavos = np.where(empate & (erro > 0), np.floor(produto) + 1, centavos)
+    centavos = np.where(empate & (erro < 0), np.floor(produto), centavos)
+    return centavos.astype('int64')
+
+
+# Acima disso (em módulo), e para infinitos, os centavos não cabem com exatidão nas contas
+# em float64/int64: esses poucos valores são formatados um a um pela versão escalar
+_MAIOR_VALOR_VETORIZADO = 1e12
+
+
+def _fora_do_vetorizado(numeros):
+    return ~np.isfinite(numeros) | (np.abs(numeros) >= _MAIOR_VALOR_VETORIZADO)
+
+
+def _como_array_float(valores):
+    if isinstance(valores, pd.Series):
+        return valores.to_numpy(dtype='float64', na_value=np.nan), valores.index
+    return np.asarray(valores, dtype='float64'), None
+
+
+def formatar_moeda_serie(valores, simbolo_moeda='R$'):
+    """Versão vetorizada de formatar_moeda: recebe uma Series (ou array) e devolve uma Series de texto."""
+    numeros, indice = _como_array_float(valores)
+    nulos = np.isnan(numeros)
+    especiais = _fora_do_vetorizado(numeros) & ~nulos
+    valores_originais = numeros
+    numeros = np.where(nulos | especiais, 0, numeros)
+    centavos = _centavos(numeros)
+
+    texto = np.char.add(np.where(np.signbit(numeros) & (numeros != 0), f'{simbolo_moeda} -', f'{simbolo_moeda} '),
+                        _com_separador_de_milhar(centavos // 100))
+    texto = np.char.add(texto, _TEXTOS_CENTAVOS[centavos % 100]).astype(object)
+    texto[especiais] = [formatar_moeda(valor, simbolo_moeda) for valor in valores_originais[especiais]]
+    return pd.Series(np.where(nulos, '', texto), index=indice, dtype='string')
+
+
+def formatar_inteiro_serie(valores):
+    """Versão vetorizada de formatar_inteiro: recebe uma Series (ou array) e devolve uma Series de texto."""
+    numeros, indice = _como_array_float(valores)
+    nulos = np.isnan(numeros)
+    especiais = _fora_do_vetorizado(numeros) & ~nulos
+    valores_originais = numeros
+    numeros = np.where(nulos | especiais, 0, numeros)
+
+    texto = np.char.add(np.where(numeros < 0, '-', ''), _com_separador_de_milhar(np.abs(np.rint(numeros))))
+    texto = texto.astype(object)
+    texto[especiais] = [formatar_inteiro(valor) for valor in valores_originais[especiais]]
+    return pd.Series(np.where(nulos, '', texto), index=indice, dtype='string')
@@ -0,0 +1,59 @@
+"""Medição do tempo de cada etapa de uma execução do painel, sem dependência do Streamlit.
+
+Cada medição vira uma linha de log em JSON (logger 'estoque.desempenho') e fica guardada na
+lista da execução atual, para o painel de desempenho:
+
+    with medir('secao1.resumo_quantidades', linhas=len(df)):
+        ...
+"""
+import contextlib
+import contextvars
+import json
+import logging
+import time
+
+registrador = logging.getLogger('estoque.desempenho')
+
+# Medições da execução atual. Cada execução do script roda numa thread do Streamlit, então
+# sessões diferentes não misturam as medições.
+_medicoes_da_execucao = contextvars.ContextVar('medicoes_da_execucao', default=None)
+
+
+def configurar_registro(nivel=logging.INFO):
+    """Envia as linhas de medição para a saída de erro, uma linha JSON por etapa (só na primeira chamada)."""
+    if not registrador.handlers:
+        manipulador = logging.StreamHandler()
+        manipulador.setFormatter(logging.Formatter('%(message)s'))
+        registrador.addHandler(manipulador)
+        registrador.propagate = False
+    registrador.setLevel(nivel)
+
+
+def iniciar_execucao():
+    """Começa uma lista nova de medições para a execução atual e a devolve."""
+    medicoes = []
+    _medicoes_da_execucao.set(medicoes)
+    return medicoes
+
+
+@contextlib.contextmanager
+def medir(etapa, linhas=None, **detalhes):
+    """Mede o bloco e registra {'etapa', 'ms', 'linhas', ...detalhes}.
+
+    'linhas' pode ser ajustada dentro do bloco, quando só é conhecida no fim:
+
+        with medir('filtros') as medicao:
+            ...
+            medicao['linhas'] = len(df_filtrado)
+    """
+    medicao = {'etapa': etapa, 'ms': None, 'linhas': linhas, **detalhes}
+    inicio = time.perf_counter()
+    try:
+        yield medicao
+    finally:
+        medicao['ms'] = round((time.perf_counter() - inicio) * 1000, 3)
+        medicoes = _medicoes_da_execucao.get()
+        if medicoes is not None:
+            medicoes.append(medicao)
+        if registrador.isEnabledFor(logging.INFO):
+            registrador.info(json.dumps(medicao, ensure_ascii=False, default=str))
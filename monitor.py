@@ -0,0 +1,122 @@
+"""Observa o arquivo de estoque e recarrega os dados em segundo plano quando ele muda.
+
+Usa o watchdog (inotify no Linux), quando disponível, para reagir logo às escritas e, em
+qualquer caso, consulta periodicamente o tamanho e a data de modificação do arquivo.
+"""
+import os
+import threading
+import time
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+
+# Eventos que indicam escrita; aberturas e leituras (inclusive as do próprio monitor) são ignoradas
+EVENTOS_DE_ESCRITA = {'created', 'modified', 'moved', 'deleted', 'closed'}
+
+
+class _EventosDoArquivo(FileSystemEventHandler):
+    """Repassa ao monitor apenas os eventos de escrita que envolvem o arquivo observado."""
+
+    def __init__(self, monitor):
+        self._monitor = monitor
+
+    def on_any_event(self, event):
+        if event.event_type not in EVENTOS_DE_ESCRITA:
+            return
+        caminhos = {getattr(event, 'src_path', None), getattr(event, 'dest_path', None)}
+        if self._monitor.caminho_arquivo in {os.path.abspath(os.fsdecode(c)) for c in caminhos if c}:
+            self._monitor.sinalizar_alteracao()
+
+
+class MonitorArquivo:
+    """Mantém a versão mais recente dos dados de um arquivo, recarregada numa thread própria.
+
+    'carregar' é chamada sem argumentos e devolve (versao, dados). O resultado fica em
+    'atual' e é substituído de uma só vez ao fim de cada recarga bem-sucedida: quem lê
+    'atual' nunca espera por uma recarga nem vê dados pela metade.
+
+    Rajadas de escrita são agrupadas: a recarga só começa depois de 'espera' segundos sem
+    novas alterações. Se a leitura falhar (arquivo ainda incompleto) ou o arquivo mudar
+    durante ela, a versão atual é mantida até a próxima alteração estabilizar.
+    """
+
+    def __init__(self, caminho_arquivo, carregar, espera=2.0, intervalo_verificacao=1.0):
+        self.caminho_arquivo = os.path.abspath(caminho_arquivo)
+        self.espera = espera
+        self.intervalo_verificacao = intervalo_verificacao
+        self.atual = None
+        self.ultimo_erro = None
+        self._carregar = carregar
+        self._ultima_alteracao = None
+        self._estado_arquivo = None
+        self._parar = threading.Event()
+        self._thread = None
+        self._observador = None
+
+    def _ler_estado_arquivo(self):
+        try:
+            info = os.stat(self.caminho_arquivo)
+        except FileNotFoundError:
+            return None
+        return info.st_size, info.st_mtime_ns
+
+    def iniciar(self):
+        """Faz a primeira carga (na thread de quem chamou) e começa a observar o arquivo."""
+        self._estado_arquivo = self._ler_estado_arquivo()
+        self.atual = self._carregar()
+
+        if Observer is not None:
+            self._observador = Observer()
+            self._observador.schedule(_EventosDoArquivo(self), os.path.dirname(self.caminho_arquivo), recursive=False)
+            self._observador.daemon = True
+            self._observador.start()
+
+        self._thread = threading.Thread(target=self._executar, name='monitor-estoque', daemon=True)
+        self._thread.start()
+        return self
+
+    def parar(self):
+        self._parar.set()
+        if self._observador is not None:
+            self._observador.stop()
+
+    def sinalizar_alteracao(self):
+        """Registra uma alteração no arquivo; a recarga acontece depois do intervalo de espera."""
+        self._ultima_alteracao = time.monotonic()
+
+    def _executar(self):
+        while not self._parar.wait(self.intervalo_verificacao):
+            # A consulta ao estado também cobre eventos perdidos pelo watchdog (ex.: volumes de rede)
+            estado = self._ler_estado_arquivo()
+            if estado != self._estado_arquivo:
+                self._estado_arquivo = estado
+                self.sinalizar_alteracao()
+
+            ultima_alteracao = self._ultima_alteracao
+            if ultima_alteracao is not None and time.monotonic() - ultima_alteracao >= self.espera:
+                self._ultima_alteracao = None
+                self._recarregar()
+
+    def _recarregar(self):
+        estado_antes = self._ler_estado_arquivo()
+        if estado_antes is None:
+            return
+        try:
+            nova = self._carregar()
+        except Exception as erro:
+            # A próxima escrita no arquivo dispara uma nova tentativa
+            self.ultimo_erro = erro
+            return
+
+        if self._ler_estado_arquivo() != estado_antes:
+            # O arquivo mudou durante a leitura: descarta e espera ele estabilizar
+            self.sinalizar_alteracao()
+            return
+        self.ultimo_erro = None
+        if self.atual is None or nova[0] != self.atual[0]:
+            self.atual = nova
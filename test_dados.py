@@ -0,0 +1,82 @@
+"""Verificações da leitura do CSV de estoque (python -m pytest)."""
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from agregados import acrescentar_ao_cubo, construir_cubo
+from dados import (IngestaoIncremental, carregar_estoque, feather, gerar_snapshot, indexar_periodos, ler_csv_estoque,
+                   preparar_estoque, snapshot_atualizado)
+
+CSV_ESTOQUE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'df_estoque.csv')
+
+
+def _ingestao(tmp_path, linhas):
+    caminho = tmp_path / 'estoque.csv'
+    caminho.write_text(''.join(linhas), encoding='utf-8')
+    return caminho, IngestaoIncremental(str(caminho), construir_cubo, acrescentar_ao_cubo)
+
+
+def _linhas_do_estoque():
+    with open(CSV_ESTOQUE, encoding='utf-8') as arquivo:
+        return arquivo.readlines()
+
+
+def test_linha_final_pela_metade_fica_pendente(tmp_path):
+    linhas = _linhas_do_estoque()
+    caminho, ingestao = _ingestao(tmp_path, linhas[:900])
+    df, df_rejeitadas, cubo = ingestao.atualizar()
+
+    # O ERP ainda está escrevendo a próxima linha: nada muda e nada é rejeitado
+    with open(caminho, 'a', encoding='utf-8') as arquivo:
+        arquivo.write(linhas[900][:30])
+    df_parcial, rejeitadas_parcial, cubo_parcial = ingestao.atualizar()
+    assert len(df_parcial) == len(df)
+    assert rejeitadas_parcial.empty
+    assert cubo_parcial['quantidade fisica'].sum() == cubo['quantidade fisica'].sum()
+
+    # Terminada a linha, ela entra como numa leitura completa
+    with open(caminho, 'a', encoding='utf-8') as arquivo:
+        arquivo.write(linhas[900][30:])
+    df_final, rejeitadas_final, _ = ingestao.atualizar()
+    df_completo, _ = ler_csv_estoque(str(caminho))
+    assert len(df_final) == len(df_completo) == len(df) + 1
+    assert rejeitadas_final.empty
+
+
+def test_linha_final_sem_quebra_entra_no_resultado(tmp_path):
+    linhas = _linhas_do_estoque()
+    caminho, ingestao = _ingestao(tmp_path, linhas[:900] + [linhas[900].rstrip('\n')])
+    df, df_rejeitadas, _ = ingestao.atualizar()
+    df_completo, _ = ler_csv_estoque(str(caminho))
+    assert len(df) == len(df_completo) == 900
+    assert df_rejeitadas.empty
+
+
+def test_arquivo_inteiro_igual_a_leitura_completa(tmp_path):
+    caminho = tmp_path / 'estoque.csv'
+    shutil.copy(CSV_ESTOQUE, caminho)
+    df, _, _ = IngestaoIncremental(str(caminho)).atualizar()
+    assert len(df) == len(ler_csv_estoque(str(caminho))[0])
+
+
+def test_indice_de_periodos_vazio(tmp_path):
+    # Arquivo só com o cabeçalho (ou com todas as linhas rejeitadas)
+    caminho, _ = _ingestao(tmp_path, _linhas_do_estoque()[:1])
+    df, _ = ler_csv_estoque(str(caminho))
+    assert indexar_periodos(preparar_estoque(df)) == {}
+
+
+@pytest.mark.skipif(feather is None, reason='o snapshot exige o pyarrow')
+def test_snapshot_de_outro_csv_com_data_antiga(tmp_path):
+    caminho = tmp_path / 'estoque.csv'
+    shutil.copy(CSV_ESTOQUE, caminho)
+    gerar_snapshot(str(caminho))
+    assert snapshot_atualizado(str(caminho))
+
+    # Substituído por uma exportação menor, com data de modificação anterior à do snapshot (cp -p)
+    pd.read_csv(CSV_ESTOQUE, dtype='string').head(99).to_csv(caminho, index=False)
+    os.utime(caminho, ns=(0, 0))
+    assert not snapshot_atualizado(str(caminho))
+    assert len(carregar_estoque(str(caminho))[0]) == 99